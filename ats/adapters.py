@@ -1,31 +1,61 @@
-import requests
-import json
+import io
+import os
 import logging
+import threading
+from contextlib import contextmanager
 from django.conf import settings
+from .client import ATSClient, CircuitOpenError
+from .extraction import ExtractionBudget, extract_text
+from .matching import get_keyword_matcher
+from .sandbox import STATUS_OK, get_extraction_pool
 
 logger = logging.getLogger(__name__)
 
+
+@contextmanager
+def open_resume(source, filename=None):
+    """
+    Yield (binary stream, filename, size) for a resume given as a path,
+    a file-like object (e.g. an UploadedFile) or an in-memory buffer
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield f, filename or os.fspath(source), os.path.getsize(source)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        size = source.nbytes if isinstance(source, memoryview) else len(source)
+        yield io.BytesIO(source), filename or '', size
+    else:
+        size = getattr(source, 'size', None)
+        if size is None:
+            source.seek(0, os.SEEK_END)
+            size = source.tell()
+        source.seek(0)
+        yield source, filename or getattr(source, 'name', None) or '', size
+
+
 class ATSAdapter:
     """Real ATS API adapter"""
     
-    def __init__(self):
+    def __init__(self, client=None):
         self.api_url = settings.ATS_API_URL
         self.api_key = settings.ATS_API_KEY
+        # Bump ATS_RULES_VERSION when the vendor changes its scoring model
+        self.rules_version = settings.ATS_RULES_VERSION
+        self.client = client or ATSClient.from_settings()
     
-    def analyze(self, file_path):
-        """Send resume to ATS API for analysis"""
+    def analyze(self, source, filename=None):
+        """Send resume (path, file-like object or bytes) to ATS API for analysis"""
         try:
-            with open(file_path, 'rb') as f:
-                files = {'resume': f}
-                headers = {'Authorization': f'Bearer {self.api_key}'}
-                response = requests.post(
-                    self.api_url,
-                    files=files,
-                    headers=headers,
-                    timeout=30
-                )
-                response.raise_for_status()
-                return response.json()
+            with open_resume(source, filename) as (f, name, size):
+                try:
+                    return self.client.analyze(os.path.basename(name) or 'resume', f)
+                except CircuitOpenError:
+                    if not settings.ATS_FALLBACK_TO_MOCK:
+                        raise
+                    logger.warning("ATS API circuit open, falling back to mock adapter")
+                    result = MockATSAdapter().analyze(f, filename=name)
+                    result['meta']['fallback'] = True
+                    return result
         except Exception as e:
             logger.error(f"ATS API error: {e}")
             raise
@@ -33,13 +63,29 @@ class ATSAdapter:
 class MockATSAdapter:
     """Mock ATS adapter for development/testing"""
     
-    def analyze(self, file_path):
+    # Bump when the heuristics below change so cached results are not reused
+    RULES_VERSION = 5
+    
+    def __init__(self, matcher=None):
+        self.matcher = matcher or get_keyword_matcher()
+    
+    @property
+    def rules_version(self):
+        # Results depend on the keyword taxonomy as well as the heuristics
+        return f"{self.RULES_VERSION}-{self.matcher.fingerprint}"
+    
+    def analyze(self, source, filename=None):
         """Perform deterministic scoring based on simple heuristics"""
+        return self.analyze_document(source, filename)[0]
+    
+    def analyze_document(self, source, filename=None):
+        """Score a resume and also return its extracted text: (result, text)"""
+        text = ''
         try:
-            # Read file content
-            import os
-            file_size = os.path.getsize(file_path)
-            file_ext = os.path.splitext(file_path)[1].lower()
+            with open_resume(source, filename) as (stream, name, file_size):
+                file_ext = os.path.splitext(name)[1].lower()
+                text, extraction = self._extract_text(stream, file_ext)
+                extraction['bytes'] = file_size
             
             # Base score
             score = 60
@@ -52,17 +98,24 @@ class MockATSAdapter:
             if 50000 < file_size < 500000:  # 50KB to 500KB
                 score += 10
             
-            # Try to extract text and check for keywords
-            text = self._extract_text(file_path)
-            keywords = ['experience', 'education', 'skills', 'projects', 'work', 
-                       'bachelor', 'master', 'technical', 'management']
-            
-            matched_keywords = sum(1 for kw in keywords if kw.lower() in text.lower())
-            score += min(matched_keywords * 2, 20)
+            # Check extracted text for keywords in a single pass
+            lowered = text.lower()
+            keyword_hits = self.matcher.count(lowered)
+            matched_keywords = len(keyword_hits)
+            keyword_weight = self.matcher.weight(keyword_hits)
+            score += min(round(keyword_weight * 2), 20)
             
             # Generate suggestions
             suggestions = []
             
+            if extraction['verdict'] != STATUS_OK:
+                suggestions.append({
+                    'name': 'Readability',
+                    'advice': 'We could not read your resume within our processing limits. '
+                              'Try exporting it again as a standard PDF or DOCX',
+                    'severity': 'high'
+                })
+            
             if matched_keywords < 5:
                 suggestions.append({
                     'name': 'Keywords',
@@ -77,7 +130,7 @@ class MockATSAdapter:
                     'severity': 'medium'
                 })
             
-            if 'bullet' not in text.lower() and '*' not in text:
+            if 'bullet' not in lowered and '*' not in text:
                 suggestions.append({
                     'name': 'Formatting',
                     'advice': 'Use bullet points to list achievements and responsibilities',
@@ -96,9 +149,12 @@ class MockATSAdapter:
                 }],
                 'meta': {
                     'matched_keywords': matched_keywords,
-                    'total_keywords': len(keywords)
+                    'total_keywords': len(self.matcher),
+                    # Not the per-term hits: with a large taxonomy they would bloat every stored analysis
+                    'keyword_weight': keyword_weight,
+                    'extraction': extraction,
                 }
-            }
+            }, text
         except Exception as e:
             logger.error(f"Mock ATS error: {e}")
             # Return default score on error
@@ -110,35 +166,85 @@ class MockATSAdapter:
                     'severity': 'low'
                 }],
                 'meta': {}
-            }
+            }, text
     
-    def _extract_text(self, file_path):
-        """Extract text from PDF or DOCX"""
-        import os
-        file_ext = os.path.splitext(file_path)[1].lower()
-        
-        try:
-            if file_ext == '.pdf':
-                from PyPDF2 import PdfReader
-                reader = PdfReader(file_path)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-                return text
-            elif file_ext == '.docx':
-                from docx import Document
-                doc = Document(file_path)
-                return "\n".join([para.text for para in doc.paragraphs])
-            else:
-                return ""
-        except:
-            return ""
+    def _extract_text(self, stream, file_ext):
+        """Extract text from a PDF or DOCX stream; returns (text, stats)"""
+        return extract_resume_text(stream, file_ext)
+
+
+def extract_resume_text(stream, file_ext):
+    """Extract text within the configured budget, isolated if enabled; returns (text, stats)"""
+    budget = ExtractionBudget.from_settings()
+    if not settings.ATS_EXTRACT_ISOLATED:
+        text, stats = extract_text(stream, file_ext, budget)
+        stats['verdict'] = STATUS_OK
+        return text, stats
+    
+    # Parse in a sandboxed subprocess so a hostile document cannot hurt this worker
+    verdict = get_extraction_pool().extract(stream.read(), file_ext, budget)
+    if verdict['status'] == STATUS_OK:
+        stats = verdict['stats']
+        stats['verdict'] = STATUS_OK
+        return verdict['text'], stats
+    logger.warning(f"Isolated extraction failed: {verdict['status']} ({verdict.get('error')})")
+    return '', {'pages': 0, 'chars': 0, 'ms': None, 'truncated': None,
+                'verdict': verdict['status'], 'error': verdict.get('error', '')}
+
+_adapter = None
+_adapter_key = None
+_adapter_lock = threading.Lock()
 
 def get_ats_adapter():
-    """Factory function to get appropriate ATS adapter"""
-    if settings.ATS_API_URL and settings.ATS_API_KEY:
-        logger.info("Using real ATS API adapter")
-        return ATSAdapter()
+    """Return the process-wide ATS adapter, creating it on first use"""
+    global _adapter, _adapter_key
+    # Keyed on the pid so a forked worker never shares its parent's pooled sockets
+    key = (os.getpid(), settings.ATS_API_URL, settings.ATS_API_KEY)
+    if _adapter_key != key:
+        with _adapter_lock:
+            if _adapter_key != key:
+                if settings.ATS_API_URL and settings.ATS_API_KEY:
+                    logger.info("Using real ATS API adapter")
+                    _adapter = ATSAdapter()
+                else:
+                    logger.info("Using mock ATS adapter")
+                    _adapter = MockATSAdapter()
+                _adapter_key = key
+    return _adapter
+
+
+def run_adapter(adapter, source, filename=None):
+    """Run the adapter; the result carries the resume's term counts (not matches) so it can be cached"""
+    if isinstance(adapter, MockATSAdapter):
+        result, text = adapter.analyze_document(source, filename)
     else:
-        logger.info("Using mock ATS adapter")
-        return MockATSAdapter()
+        result = adapter.analyze(source, filename)
+        text = ''
+        if settings.ATS_JOB_MATCHING:
+            with open_resume(source, filename) as (stream, name, size):
+                text, _ = extract_resume_text(stream, os.path.splitext(name)[1].lower())
+    
+    if settings.ATS_JOB_MATCHING and text:
+        from jobs.matching import resume_terms
+        result['match_terms'] = resume_terms(text)
+    return result
+
+
+def attach_job_matches(result):
+    """Copy of a run_adapter() result with its term counts replaced by matches against current postings"""
+    result = dict(result)
+    terms = result.pop('match_terms', None)
+    # Matches stored in older cache entries may point at postings that have since changed
+    result.pop('job_matches', None)
+    if settings.ATS_JOB_MATCHING and terms:
+        from jobs.matching import match_terms
+        try:
+            result['job_matches'] = match_terms(terms)
+        except Exception as e:
+            logger.error(f"Job matching failed: {e}")
+    return result
+
+
+def analyze_resume(adapter, source, filename=None):
+    """Run the adapter and attach the best matching job postings to its result"""
+    return attach_job_matches(run_adapter(adapter, source, filename))
@@ -1,13 +1,65 @@
 from django.contrib import admin
-from .models import ATSAnalysis
+from common.admin_mixins import LargeTableAdminMixin
+from .models import ATSAnalysis, ATSDailyRollup, ATSSuggestionPayload
+
+
+class ScoreBandFilter(admin.SimpleListFilter):
+    """Fixed score ranges instead of a DISTINCT over every stored score"""
+    title = 'score'
+    parameter_name = 'score_band'
+    bands = {
+        'low': ('Below 50', 0, 49),
+        'fair': ('50-69', 50, 69),
+        'good': ('70-84', 70, 84),
+        'excellent': ('85 and above', 85, 100),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, label) for key, (label, low, high) in self.bands.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() in self.bands:
+            _, low, high = self.bands[self.value()]
+            return queryset.filter(score__gte=low, score__lte=high)
+        return queryset
+
 
 @admin.register(ATSAnalysis)
-class ATSAnalysisAdmin(admin.ModelAdmin):
-    list_display = ['user', 'score', 'created_at']
-    list_filter = ['created_at', 'score']
+class ATSAnalysisAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'score', 'status', 'created_at']
+    list_filter = ['status', 'created_at', ScoreBandFilter]
+    list_select_related = ['user']
     search_fields = ['user__username', 'user__email']
-    readonly_fields = ['user', 'score', 'suggestions_json', 'created_at']
+    readonly_fields = ['user', 'score', 'status', 'payload', 'suggestions_json', 'error', 'attempts',
+                       'started_at', 'finished_at', 'created_at']
+    exclude = ['upload_path']
     date_hierarchy = 'created_at'
     
     def has_add_permission(self, request):
         return False
+
+
+@admin.register(ATSDailyRollup)
+class ATSDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'bucket', 'analyses', 'score_total']
+    list_filter = ['bucket']
+    date_hierarchy = 'day'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ATSSuggestionPayload)
+class ATSSuggestionPayloadAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'created_at']
+    search_fields = ['digest']
+    readonly_fields = ['digest', 'sections', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
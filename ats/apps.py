@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 class AtsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ats'
     verbose_name = 'ATS Resume Checker'
+
+    def ready(self):
+        from .models import ATSAnalysis
+        from .rollups import count_finished_analysis
+        # Score analytics are counted as analyses finish, not grouped at read time
+        post_save.connect(count_finished_analysis, sender=ATSAnalysis)
@@ -0,0 +1,82 @@
+"""
+Content-addressed cache of ATS results.
+
+Results are keyed by the SHA-256 of the uploaded file, the adapter class and the
+adapter's scoring-rules version, so re-uploading the same resume skips text
+extraction and the remote API call. Entries live in the ``ats_results`` cache,
+which bounds its size and evicts old entries on its own.
+
+Entries hold the resume's term counts rather than its job matches; callers
+run ``attach_job_matches`` on every use so matches follow the live postings.
+"""
+import hashlib
+import logging
+
+from django.core.cache import caches
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+logger = logging.getLogger('ats')
+
+CACHE_ALIAS = 'ats_results'
+
+
+class ContentHashMixin:
+    """Upload handler mixin that hashes file data as it streams in"""
+
+    def new_file(self, *args, **kwargs):
+        # Set up first: the memory handler ends new_file by raising StopFutureHandlers
+        self.content_hash = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.content_hash.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.content_hash.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(ContentHashMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(ContentHashMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def content_hash(uploaded_file):
+    """Return the SHA-256 of an upload, reusing the digest computed while streaming"""
+    digest = getattr(uploaded_file, 'content_hash', None)
+    if digest:
+        return digest
+    sha = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        sha.update(chunk)
+    uploaded_file.seek(0)
+    uploaded_file.content_hash = sha.hexdigest()
+    return uploaded_file.content_hash
+
+
+def result_cache_key(adapter, digest):
+    """Build the cache key for a (content hash, adapter type, rules version) triple"""
+    return f"ats:result:{type(adapter).__name__}:{adapter.rules_version}:{digest}"
+
+
+def get_cached_result(adapter, digest):
+    """Return a previously computed result for this upload, or None"""
+    if not digest:
+        return None
+    result = caches[CACHE_ALIAS].get(result_cache_key(adapter, digest))
+    if result is not None:
+        logger.info(f"ATS result cache hit for {digest[:12]}")
+    return result
+
+
+def cache_result(adapter, digest, result):
+    """Remember an adapter result for later uploads of the same file"""
+    # Results produced by the mock fallback must not be served as vendor results
+    if digest and not result.get('meta', {}).get('fallback'):
+        caches[CACHE_ALIAS].set(result_cache_key(adapter, digest), result)
@@ -0,0 +1,158 @@
+"""
+HTTP client for the remote ATS API.
+
+A single pooled keep-alive ``requests.Session`` is shared by every request in
+the process. Transient failures (connection errors, timeouts, 429 and 5xx)
+are retried with jittered exponential backoff, and a circuit breaker stops
+calling the vendor for a while after repeated failures so workers fail fast
+instead of each waiting out the full timeout.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('ats')
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is refusing calls"""
+
+
+class RetryableResponse(Exception):
+    """A response whose status code is worth retrying"""
+
+    def __init__(self, response):
+        super().__init__(f"ATS API returned {response.status_code}")
+        self.response = response
+
+
+class CircuitBreaker:
+    """Open after N consecutive failures, allow a trial call after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Return True if a call may be attempted now"""
+        with self._lock:
+            state = self.state
+            if state == self.HALF_OPEN:
+                # Let one trial call through; push the window out for everyone else
+                self.opened_at = time.monotonic()
+                return True
+            return state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.error(f"ATS circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+
+class ATSClient:
+    """Pooled, retrying HTTP client for the ATS vendor API"""
+
+    def __init__(self, api_url, api_key, pool_size=10, connect_timeout=3.05, read_timeout=30,
+                 max_retries=2, backoff=0.5, breaker=None):
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {api_key}'
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+        return cls(
+            settings.ATS_API_URL,
+            settings.ATS_API_KEY,
+            pool_size=settings.ATS_HTTP_POOL_SIZE,
+            connect_timeout=settings.ATS_HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.ATS_HTTP_READ_TIMEOUT,
+            max_retries=settings.ATS_HTTP_MAX_RETRIES,
+            backoff=settings.ATS_HTTP_BACKOFF,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.ATS_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.ATS_CIRCUIT_RESET_TIMEOUT,
+            ),
+        )
+
+    def analyze(self, filename, stream):
+        """POST a resume stream and return the decoded JSON result"""
+        if not self.breaker.allow():
+            raise CircuitOpenError('ATS API circuit is open')
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                stream.seek(0)
+                response = self.session.post(
+                    self.api_url,
+                    files={'resume': (filename, stream)},
+                    timeout=self.timeout,
+                )
+                if response.status_code in RETRY_STATUSES:
+                    raise RetryableResponse(response)
+                break
+            except (requests.ConnectionError, requests.Timeout, RetryableResponse) as e:
+                if attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    if isinstance(e, RetryableResponse):
+                        e.response.raise_for_status()
+                    raise
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+                logger.warning(f"ATS API attempt {attempt + 1} failed ({e}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception:
+                # Every exit must settle the breaker, or a half-open trial would never end
+                self.breaker.record_failure()
+                raise
+
+        if response.status_code >= 400:
+            # The API answered and rejected this request: a client error, not an outage
+            self.breaker.record_success()
+            response.raise_for_status()
+        try:
+            result = response.json()
+        except ValueError:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def close(self):
+        self.session.close()
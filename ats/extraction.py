@@ -0,0 +1,109 @@
+"""
+Budgeted text extraction for resumes.
+
+Pages (PDF) and paragraphs (DOCX) are streamed one at a time, collected in a
+list and joined once at the end. Extraction stops early when the page,
+character or wall-clock budget is exhausted, so an oversized upload cannot pin
+a worker for long.
+"""
+import itertools
+import logging
+import time
+
+logger = logging.getLogger('ats')
+
+
+class ExtractionBudget:
+    """Upper bounds for a single extraction"""
+
+    def __init__(self, max_pages=20, max_chars=200000, max_seconds=5.0):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_seconds = max_seconds
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+        return cls(
+            max_pages=settings.ATS_EXTRACT_MAX_PAGES,
+            max_chars=settings.ATS_EXTRACT_MAX_CHARS,
+            max_seconds=settings.ATS_EXTRACT_MAX_SECONDS,
+        )
+
+    def __repr__(self):
+        return (f"ExtractionBudget(max_pages={self.max_pages}, max_chars={self.max_chars}, "
+                f"max_seconds={self.max_seconds})")
+
+
+def iter_pdf_pages(stream):
+    """Return (page count, iterator extracting each page's text lazily)"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(stream)
+    return len(reader.pages), (page.extract_text() or '' for page in reader.pages)
+
+
+def iter_docx_paragraphs(stream):
+    """Return (paragraph count, iterator over paragraph text)"""
+    from docx import Document
+    paragraphs = Document(stream).paragraphs
+    return len(paragraphs), (paragraph.text for paragraph in paragraphs)
+
+
+PART_READERS = {
+    '.pdf': iter_pdf_pages,
+    '.docx': iter_docx_paragraphs,
+}
+
+
+def extract_text(stream, file_ext, budget=None):
+    """
+    Extract text from a PDF or DOCX stream within the given budget.
+
+    Returns ``(text, stats)`` where stats holds the number of pages read,
+    characters kept, elapsed milliseconds and the reason extraction stopped
+    early (``truncated``), if any.
+    """
+    budget = budget or ExtractionBudget()
+    started = time.monotonic()
+    parts = []
+    pages = chars = 0
+    truncated = None
+    error = None
+
+    reader = PART_READERS.get(file_ext)
+    if reader is not None:
+        try:
+            total, part_iter = reader(stream)
+            if file_ext == '.pdf' and total > budget.max_pages:
+                part_iter = itertools.islice(part_iter, budget.max_pages)
+                truncated = 'pages'
+            for part in part_iter:
+                if file_ext == '.pdf':
+                    pages += 1
+                if chars + len(part) > budget.max_chars:
+                    parts.append(part[:budget.max_chars - chars])
+                    chars = budget.max_chars
+                    truncated = 'chars'
+                    break
+                parts.append(part)
+                chars += len(part)
+                if time.monotonic() - started > budget.max_seconds:
+                    truncated = 'time'
+                    break
+        except MemoryError:
+            raise
+        except Exception as e:
+            logger.warning(f"Text extraction failed for {file_ext} file: {e}")
+            error = str(e)
+
+    stats = {
+        'pages': pages,
+        'chars': chars,
+        'ms': round((time.monotonic() - started) * 1000, 1),
+        'truncated': truncated,
+    }
+    if error:
+        stats['error'] = error
+    # PDF pages are concatenated as before; DOCX paragraphs stay on separate lines
+    separator = '' if file_ext == '.pdf' else '\n'
+    return separator.join(parts), stats
@@ -0,0 +1,172 @@
+"""
+Score a directory or archive of resumes in bulk.
+
+Usage: python manage.py ats_batch resumes.zip [--workers 8] [--output results.jsonl]
+                                              [--save-for USERNAME]
+"""
+import hashlib
+import json
+import math
+import os
+import tarfile
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ats.adapters import attach_job_matches, get_ats_adapter, run_adapter
+from ats.cache import get_cached_result, cache_result
+from ats.models import ATSAnalysis
+from ats.payloads import result_fields
+from ats.rollups import fold_into_rollups
+
+RESUME_EXTENSIONS = ('.pdf', '.doc', '.docx')
+
+
+def iter_resumes(path, max_size):
+    """Yield (name, bytes) for every resume in a directory, tar or zip archive"""
+    def wanted(name, size):
+        return name.lower().endswith(RESUME_EXTENSIONS) and 0 < size <= max_size
+
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                if wanted(filename, os.path.getsize(full_path)):
+                    with open(full_path, 'rb') as f:
+                        yield os.path.relpath(full_path, path), f.read()
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and wanted(info.filename, info.file_size):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(path):
+        # Stream mode reads members in order without building the full index first
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and wanted(member.name, member.size):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise CommandError(f'{path} is not a directory, zip or tar archive')
+
+
+def score_resume(name, data):
+    """Worker-process task: analyze one resume and time it"""
+    started = time.perf_counter()
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        adapter = get_ats_adapter()
+        result = get_cached_result(adapter, digest)
+        if result is None:
+            result = run_adapter(adapter, data, filename=name)
+            cache_result(adapter, digest, result)
+        error = None
+    except Exception as e:
+        result, error = None, str(e)
+    return name, digest, result, error, (time.perf_counter() - started) * 1000
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def save_rows(rows):
+    """Bulk insert finished analyses and add them to the daily counters (bulk_create skips post_save)"""
+    ATSAnalysis.objects.bulk_create(rows)
+    fold_into_rollups([{'created_at': row.created_at, 'score': row.score} for row in rows])
+    rows.clear()
+
+
+class Command(BaseCommand):
+    help = 'Score every resume in a directory or tar/zip archive using all CPU cores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Directory, .zip or .tar(.gz) archive of resumes')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes (default: all cores)')
+        parser.add_argument('--output', default='-',
+                            help='JSONL output file ("-" for stdout)')
+        parser.add_argument('--save-for', metavar='USERNAME',
+                            help='Also store ATSAnalysis rows for this user')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows per bulk insert when saving analyses')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+
+        user = None
+        if options['save_for']:
+            try:
+                user = User.objects.get(username=options['save_for'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['save_for']} does not exist")
+
+        workers = max(1, options['workers'])
+        batch_size = options['batch_size']
+        max_size = int(settings.MAX_UPLOAD_SIZE)
+        output = self.stdout if options['output'] == '-' else open(options['output'], 'w')
+
+        latencies = []
+        failed = 0
+        pending_rows = []
+        started = time.perf_counter()
+
+        def record(future):
+            nonlocal failed
+            name, digest, result, error, ms = future.result()
+            latencies.append(ms)
+            line = {'file': name, 'sha256': digest, 'ms': round(ms, 1)}
+            if error:
+                failed += 1
+                line['error'] = error
+            else:
+                line.update(score=result['score'], sections=result['sections'], meta=result.get('meta', {}))
+                if user is not None:
+                    pending_rows.append(ATSAnalysis(user=user, content_hash=digest, rolled_up=True,
+                                                    **result_fields(attach_job_matches(result))))
+            output.write(json.dumps(line) + '\n')
+            if len(pending_rows) >= batch_size:
+                save_rows(pending_rows)
+
+        # Children must not inherit open database connections
+        connections.close_all()
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork')) as pool:
+                in_flight = set()
+                for name, data in iter_resumes(path, max_size):
+                    in_flight.add(pool.submit(score_resume, name, data))
+                    # Bound the number of documents held in memory at once
+                    if len(in_flight) >= workers * 4:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record(future)
+                for future in wait(in_flight).done:
+                    record(future)
+            if pending_rows:
+                save_rows(pending_rows)
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        total = len(latencies)
+        summary = (
+            f'Scored {total - failed}/{total} resumes in {elapsed:.1f}s '
+            f'({total / elapsed if elapsed else 0:.1f}/s) with {workers} workers; '
+            f'p50 {percentile(latencies, 50):.0f} ms, p95 {percentile(latencies, 95):.0f} ms'
+        )
+        self.stderr.write(self.style.SUCCESS(summary))
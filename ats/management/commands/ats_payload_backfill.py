@@ -0,0 +1,83 @@
+"""
+Move the suggestion sections of existing ATS analyses into shared payloads.
+
+Walks the table in primary-key batches, stores each distinct suggestion list
+once in ATSSuggestionPayload and leaves only the per-analysis details in
+``suggestions_json``. Rows already pointing at a payload are skipped, so it is
+safe to re-run or interrupt at any point. Reports the JSON bytes stored before
+and after so the saving can be checked.
+
+The repo ships no migrations, so this command is the data migration for the
+payload table. It finishes by deleting payloads that no analysis refers to any
+more (left behind by ats_retention and account deletion); payloads created in
+the last PRUNE_GRACE are kept, since a request may be about to reference them.
+
+Usage: python manage.py ats_payload_backfill [--batch-size 500] [--pause 0.1] [--no-prune]
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ats.models import ATSAnalysis, ATSSuggestionPayload
+from ats.payloads import canonical_json, intern_sections, result_details
+
+PRUNE_GRACE = timedelta(hours=1)
+
+
+def json_size(value):
+    """Bytes of the canonical JSON for a stored value (0 for NULL)"""
+    return 0 if value is None else len(canonical_json(value).encode())
+
+
+class Command(BaseCommand):
+    help = 'Deduplicate ATS suggestion sections into shared payload rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Analyses rewritten per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--no-prune', dest='prune', action='store_false',
+                            help='Keep payloads no analysis refers to any more')
+
+    def handle(self, *args, **options):
+        pending = (ATSAnalysis.objects
+                   .filter(payload__isnull=True, suggestions_json__has_key='sections')
+                   .only('id', 'suggestions_json')
+                   .order_by('id'))
+        last_id = 0
+        moved = created = before = after = 0
+        while True:
+            with transaction.atomic():
+                rows = list(pending.filter(id__gt=last_id)[:options['batch_size']])
+                if not rows:
+                    break
+                for analysis in rows:
+                    result = analysis.suggestions_json
+                    before += json_size(result)
+                    analysis.payload, is_new = intern_sections(result['sections'])
+                    if is_new:
+                        created += 1
+                        after += json_size(analysis.payload.sections)
+                    analysis.suggestions_json = result_details(result)
+                    after += json_size(analysis.suggestions_json)
+                ATSAnalysis.objects.bulk_update(rows, ['payload', 'suggestions_json'])
+            last_id = rows[-1].id
+            moved += len(rows)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        saved = before - after
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} analyses onto {created} new payloads: '
+            f'{before} -> {after} JSON bytes ({saved} saved)'
+        ))
+
+        if options['prune']:
+            orphans = ATSSuggestionPayload.objects.filter(analyses__isnull=True,
+                                                          created_at__lt=timezone.now() - PRUNE_GRACE)
+            pruned, _ = orphans.delete()
+            self.stdout.write(f'Deleted {pruned} unreferenced payloads')
@@ -0,0 +1,80 @@
+"""
+Keep only each user's most recent detailed ATS analyses.
+
+Older finished analyses are deleted a small batch per transaction, so the
+table stays small without long locks. Any not yet counted in the
+ATSDailyRollup counters are folded in first, so daily score statistics
+are preserved.
+
+Run periodically (e.g. nightly from cron):
+    python manage.py ats_retention [--keep 20] [--batch-size 500] [--pause 0.2] [--dry-run]
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from ats.models import ATSAnalysis
+from ats.rollups import fold_into_rollups
+
+FINISHED = [ATSAnalysis.STATUS_DONE, ATSAnalysis.STATUS_FAILED]
+
+
+def users_over_limit(keep):
+    """Ids of users with more than `keep` finished analyses"""
+    return (ATSAnalysis.objects.filter(status__in=FINISHED).order_by()
+            .values('user').annotate(analyses=Count('id')).filter(analyses__gt=keep)
+            .values_list('user', flat=True))
+
+
+def expire_batch(user_id, keep, batch_size):
+    """Roll up and delete one batch of a user's oldest analyses; returns the number deleted"""
+    with transaction.atomic():
+        rows = list(ATSAnalysis.objects.filter(user_id=user_id, status__in=FINISHED)
+                    .order_by('-created_at', '-id').values('id', 'created_at', 'score', 'rolled_up')
+                    [keep:keep + batch_size])
+        if not rows:
+            return 0
+        # Analyses counted when they finished are already in the rollups
+        fold_into_rollups([row for row in rows if not row['rolled_up']])
+        ATSAnalysis.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+class Command(BaseCommand):
+    help = "Roll up and delete ATS analyses beyond each user's most recent N"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=settings.ATS_RETENTION_KEEP,
+                            help='Detailed analyses kept per user')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Analyses deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many analyses would be deleted')
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        user_ids = list(users_over_limit(keep))
+
+        if options['dry_run']:
+            excess = sum(ATSAnalysis.objects.filter(user_id=user_id, status__in=FINISHED).count() - keep
+                         for user_id in user_ids)
+            self.stdout.write(f'{excess} analyses from {len(user_ids)} users would be rolled up and deleted')
+            return
+
+        total = 0
+        for user_id in user_ids:
+            while True:
+                deleted = expire_batch(user_id, keep, options['batch_size'])
+                if not deleted:
+                    break
+                total += deleted
+                if options['pause']:
+                    time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up and deleted {total} analyses from {len(user_ids)} users, keeping {keep} each'))
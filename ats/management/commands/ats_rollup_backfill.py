@@ -0,0 +1,34 @@
+"""
+Add finished ATS analyses that predate the daily rollups to the counters.
+
+Walks the table in primary-key batches and only counts rows not yet flagged
+``rolled_up``, so it is safe to re-run or interrupt at any point.
+
+Usage: python manage.py ats_rollup_backfill [--batch-size 1000] [--pause 0.1]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ats.rollups import roll_up_batch
+
+
+class Command(BaseCommand):
+    help = 'Count existing finished ATS analyses into the daily score rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Analyses examined per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        last_id, total = 0, 0
+        while True:
+            last_id, counted = roll_up_batch(last_id, options['batch_size'])
+            if last_id is None:
+                break
+            total += counted
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Added {total} analyses to the daily rollups'))
@@ -0,0 +1,81 @@
+"""
+Run the ATS analysis worker pool.
+
+Usage: python manage.py ats_worker [--workers 2] [--drain]
+"""
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ats.queue import run_worker
+
+
+def _worker_main(poll_interval, drain):
+    """Entry point of a forked worker process"""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(poll_interval=poll_interval, drain=drain, should_stop=lambda: bool(stopping))
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Process queued ATS analyses with a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.ATS_QUEUE_WORKERS,
+                            help='Number of worker processes (1 runs in the foreground)')
+        parser.add_argument('--poll-interval', type=float, default=settings.ATS_QUEUE_POLL_INTERVAL,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--drain', action='store_true',
+                            help='Exit once the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        poll_interval = options['poll_interval']
+        drain = options['drain']
+
+        if workers == 1:
+            processed = run_worker(poll_interval=poll_interval, drain=drain)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} analyses'))
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        pool = {}
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+
+        def spawn(slot):
+            process = context.Process(target=_worker_main, args=(poll_interval, drain),
+                                      name=f'ats-worker-{slot}')
+            process.start()
+            pool[slot] = process
+
+        for slot in range(workers):
+            spawn(slot)
+        self.stdout.write(f'Started {workers} ATS workers')
+
+        try:
+            while pool and not stopping:
+                for slot, process in list(pool.items()):
+                    if process.is_alive():
+                        continue
+                    del pool[slot]
+                    if not drain:
+                        self.stderr.write(f'{process.name} exited ({process.exitcode}), restarting')
+                        spawn(slot)
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in pool.values():
+                process.terminate()
+            for process in pool.values():
+                process.join()
+        self.stdout.write(self.style.SUCCESS('ATS workers stopped'))
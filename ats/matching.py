@@ -0,0 +1,111 @@
+"""
+Single-pass keyword matching for ATS scoring.
+
+Terms (single words or multi-word phrases) are compiled once per process into
+a token trie. The lowered resume text is tokenized in one regex pass and the
+trie is walked from each token, so matching cost grows with the length of the
+text rather than with the number of terms, and matches always fall on word
+boundaries ("work" does not match "network"). Hyphens and dots separate
+words, so "front-end" is the phrase "front end" and "project-management"
+contains "management".
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+logger = logging.getLogger('ats')
+
+# Words with trailing +/# kept (c++, c#), plus a standalone leading-dot .net; any other
+# '.' or '-' separates words, so node.js and front-end are two-token phrases
+TOKEN_RE = re.compile(r"(?<![a-z0-9])\.net\b|[a-z0-9]+[+#]*")
+
+DEFAULT_KEYWORDS = {
+    'experience': 1, 'education': 1, 'skills': 1, 'projects': 1, 'work': 1,
+    'bachelor': 1, 'master': 1, 'technical': 1, 'management': 1,
+}
+
+_TERMINAL = None  # trie key marking the end of a term
+
+
+def tokenize(text):
+    """Yield (token, start offset) pairs for already-lowered text"""
+    for match in TOKEN_RE.finditer(text):
+        yield match.group(), match.start()
+
+
+class KeywordMatcher:
+    """Matches a weighted set of terms against text in a single pass"""
+
+    def __init__(self, terms):
+        self.weights = {}
+        self.trie = {}
+        for term, weight in terms.items():
+            tokens = [token for token, _ in tokenize(term.lower())]
+            if not tokens:
+                continue
+            # Report terms as written ("node.js"); spellings that tokenize alike share a trie path
+            key = ' '.join(term.lower().split())
+            self.weights[key] = float(weight)
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_TERMINAL] = key
+        digest = hashlib.sha256(json.dumps(sorted(self.weights.items())).encode())
+        self.fingerprint = digest.hexdigest()[:12]
+
+    def __len__(self):
+        return len(self.weights)
+
+    def find(self, text):
+        """Return {term: [start offsets]} for every term found in lowered text"""
+        tokens = list(tokenize(text))
+        hits = {}
+        for i, (token, start) in enumerate(tokens):
+            node = self.trie.get(token)
+            j = i + 1
+            while node is not None:
+                term = node.get(_TERMINAL)
+                if term is not None:
+                    hits.setdefault(term, []).append(start)
+                if j >= len(tokens):
+                    break
+                node = node.get(tokens[j][0])
+                j += 1
+        return hits
+
+    def count(self, text):
+        """Return {term: hit count} for lowered text"""
+        return {term: len(positions) for term, positions in self.find(text).items()}
+
+    def weight(self, terms):
+        """Sum the weights of the given matched terms"""
+        return sum(self.weights[term] for term in terms)
+
+
+def load_taxonomy(path):
+    """Load {term: weight} from a JSON object or a term,weight CSV file"""
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    terms = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#'):
+                continue
+            terms[row[0]] = float(row[1]) if len(row) > 1 and row[1] else 1
+    return terms
+
+
+@lru_cache(maxsize=None)
+def get_keyword_matcher():
+    """Return the process-wide matcher for ATS_SKILLS_TAXONOMY (compiled once)"""
+    from django.conf import settings
+    path = settings.ATS_SKILLS_TAXONOMY
+    terms = load_taxonomy(path) if path else DEFAULT_KEYWORDS
+    matcher = KeywordMatcher(terms)
+    logger.info(f"Compiled ATS keyword matcher with {len(matcher)} terms")
+    return matcher
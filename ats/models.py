@@ -1,16 +1,98 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+
+class ATSSuggestionPayload(models.Model):
+    """Suggestion list stored once and shared by every analysis that produced the same advice"""
+    digest = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the canonical JSON")
+    sections = models.JSONField(help_text="Suggestion sections as returned by the ATS adapter")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'ATS Suggestion Payload'
+        verbose_name_plural = 'ATS Suggestion Payloads'
+
+    def __str__(self):
+        return self.digest[:12]
+
+
 class ATSAnalysis(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ats_analyses')
-    score = models.IntegerField(help_text="ATS score 0-100")
-    suggestions_json = models.JSONField(help_text="Detailed suggestions from ATS")
+    score = models.IntegerField(null=True, blank=True, help_text="ATS score 0-100")
+    payload = models.ForeignKey(ATSSuggestionPayload, null=True, blank=True, on_delete=models.PROTECT,
+                                related_name='analyses', help_text="Shared suggestion sections")
+    suggestions_json = models.JSONField(null=True, blank=True,
+                                        help_text="Per-analysis details (keyword stats, job matches); "
+                                                  "older rows hold the whole adapter result")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_DONE)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True,
+                                    help_text="SHA-256 of the uploaded file")
+    upload_path = models.CharField(max_length=500, blank=True, help_text="Temporary file awaiting analysis")
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    rolled_up = models.BooleanField(default=False, editable=False,
+                                    help_text="Already counted in ATSDailyRollup")
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'ATS Analysis'
         verbose_name_plural = 'ATS Analyses'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            # Admin changelist order (the admin appends -pk)
+            models.Index(fields=['created_at', 'id'], name='atsanalysis_created_idx'),
+            # A user's history, newest first (checker page, history pages, retention); id breaks
+            # ties so the (created_at, id) cursor seek needs no sort
+            models.Index(fields=['user', '-created_at', '-id'], name='atsanalysis_user_recent_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - Score: {self.score} ({self.created_at.date()})"
+        score = self.score if self.score is not None else self.get_status_display()
+        return f"{self.user.username} - Score: {score} ({self.created_at.date()})"
+    
+    @property
+    def result(self):
+        """The adapter result, reassembled from the score, shared payload and per-analysis details"""
+        if self.payload_id is None:
+            return self.suggestions_json  # not yet moved by ats_payload_backfill
+        return {'score': self.score, 'sections': self.payload.sections, **(self.suggestions_json or {})}
+
+    @property
+    def is_finished(self):
+        """Check if the analysis has left the queue"""
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class ATSDailyRollup(models.Model):
+    """Number of finished analyses per day and score bucket, maintained as analyses finish"""
+    NO_SCORE = -1  # failed analyses
+
+    day = models.DateField()
+    bucket = models.SmallIntegerField(help_text="Score // 10 (100 counts as 9); -1 for no score")
+    analyses = models.PositiveIntegerField(default=0)
+    score_total = models.BigIntegerField(default=0, help_text="Sum of scores, for daily averages")
+
+    class Meta:
+        ordering = ['-day', 'bucket']
+        verbose_name = 'ATS Daily Rollup'
+        verbose_name_plural = 'ATS Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'bucket'], name='ats_rollup_day_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} bucket {self.bucket}: {self.analyses}"
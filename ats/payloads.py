@@ -0,0 +1,47 @@
+"""
+Content-addressed storage for ATS suggestion sections.
+
+Adapters return a small number of distinct suggestion lists, so instead of
+copying them into every ATSAnalysis row they are stored once in
+ATSSuggestionPayload, keyed by the SHA-256 of their canonical JSON. The score
+has its own column, and the per-resume remainder of the result (keyword
+statistics, job matches) stays in ``ATSAnalysis.suggestions_json``.
+"""
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+
+from .models import ATSSuggestionPayload
+
+
+def canonical_json(value):
+    """Stable JSON text: sorted keys, no insignificant whitespace"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def intern_sections(sections):
+    """Return (payload, created) for a suggestion list, storing it on first sight"""
+    text = canonical_json(sections)
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    payload = ATSSuggestionPayload.objects.filter(digest=digest).first()
+    if payload is not None:
+        return payload, False
+    try:
+        with transaction.atomic():
+            return ATSSuggestionPayload.objects.create(digest=digest, sections=json.loads(text)), True
+    except IntegrityError:
+        # Stored concurrently by another request or worker
+        return ATSSuggestionPayload.objects.get(digest=digest), False
+
+
+def result_details(result):
+    """The per-analysis part of an adapter result, or None when there is nothing beyond score and sections"""
+    details = {key: value for key, value in result.items() if key not in ('score', 'sections')}
+    return details or None
+
+
+def result_fields(result):
+    """ATSAnalysis field values for an adapter result"""
+    payload, _ = intern_sections(result.get('sections', []))
+    return {'score': result['score'], 'payload': payload, 'suggestions_json': result_details(result)}
@@ -0,0 +1,159 @@
+"""
+Database-backed queue for ATS analyses.
+
+The web request only stores the upload and creates a pending ATSAnalysis row;
+the ``ats_worker`` management command claims pending rows and runs the adapter.
+"""
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .adapters import attach_job_matches, get_ats_adapter, run_adapter
+from .cache import content_hash, get_cached_result, cache_result
+from .models import ATSAnalysis
+from .payloads import result_fields
+
+logger = logging.getLogger('ats')
+
+CLAIM_BATCH_SIZE = 10
+
+
+def enqueue_analysis(user, uploaded_file):
+    """Store the upload in TEMP_UPLOAD_DIR and create a pending analysis"""
+    digest = content_hash(uploaded_file)
+    result = get_cached_result(get_ats_adapter(), digest)
+    if result is not None:
+        result = attach_job_matches(result)
+        # Identical upload seen before: record it for history without queueing
+        now = timezone.now()
+        return ATSAnalysis.objects.create(
+            **result_fields(result),
+            user=user,
+            content_hash=digest,
+            started_at=now,
+            finished_at=now,
+        )
+
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    temp_path = os.path.join(settings.TEMP_UPLOAD_DIR, f"{uuid.uuid4().hex}{ext}")
+
+    with open(temp_path, 'wb+') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+    analysis = ATSAnalysis.objects.create(
+        user=user,
+        status=ATSAnalysis.STATUS_PENDING,
+        content_hash=digest,
+        upload_path=temp_path,
+    )
+    logger.info(f"ATS analysis {analysis.pk} queued for {user.username}")
+    return analysis
+
+
+def claim_next_analysis():
+    """Atomically move the oldest pending analysis to running and return it"""
+    candidates = (
+        ATSAnalysis.objects
+        .filter(status=ATSAnalysis.STATUS_PENDING)
+        .order_by('created_at', 'id')
+        .values_list('id', flat=True)[:CLAIM_BATCH_SIZE]
+    )
+    for pk in list(candidates):
+        # Conditional update: only one worker can win the pending -> running transition
+        claimed = ATSAnalysis.objects.filter(pk=pk, status=ATSAnalysis.STATUS_PENDING).update(
+            status=ATSAnalysis.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ATSAnalysis.objects.get(pk=pk)
+    return None
+
+
+def process_analysis(analysis):
+    """Run the adapter for a claimed analysis and record the outcome"""
+    max_attempts = settings.ATS_QUEUE_MAX_ATTEMPTS
+    adapter = get_ats_adapter()
+    try:
+        result = get_cached_result(adapter, analysis.content_hash)
+        if result is None:
+            result = run_adapter(adapter, analysis.upload_path)
+            cache_result(adapter, analysis.content_hash, result)
+        result = attach_job_matches(result)
+    except Exception as e:
+        logger.error(f"ATS analysis {analysis.pk} failed (attempt {analysis.attempts}): {e}")
+        analysis.error = str(e)
+        if analysis.attempts < max_attempts:
+            analysis.status = ATSAnalysis.STATUS_PENDING
+            analysis.save(update_fields=['status', 'error'])
+            return analysis
+        analysis.status = ATSAnalysis.STATUS_FAILED
+        analysis.finished_at = timezone.now()
+    else:
+        for field, value in result_fields(result).items():
+            setattr(analysis, field, value)
+        analysis.status = ATSAnalysis.STATUS_DONE
+        analysis.error = ''
+        analysis.finished_at = timezone.now()
+        logger.info(f"ATS analysis {analysis.pk} complete: Score {result['score']}")
+
+    _discard_upload(analysis)
+    analysis.save(update_fields=['score', 'payload', 'suggestions_json', 'status', 'error',
+                                 'finished_at', 'upload_path'])
+    return analysis
+
+
+def requeue_stale_analyses():
+    """Return analyses stuck in running (e.g. a killed worker) to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=settings.ATS_QUEUE_STALE_AFTER)
+    stale = ATSAnalysis.objects.filter(status=ATSAnalysis.STATUS_RUNNING, started_at__lt=cutoff)
+    requeued = stale.filter(attempts__lt=settings.ATS_QUEUE_MAX_ATTEMPTS).update(
+        status=ATSAnalysis.STATUS_PENDING
+    )
+    for analysis in stale.filter(attempts__gte=settings.ATS_QUEUE_MAX_ATTEMPTS):
+        analysis.status = ATSAnalysis.STATUS_FAILED
+        analysis.error = 'Analysis timed out'
+        analysis.finished_at = timezone.now()
+        _discard_upload(analysis)
+        analysis.save(update_fields=['status', 'error', 'finished_at', 'upload_path'])
+    if requeued:
+        logger.warning(f"Requeued {requeued} stale ATS analyses")
+    return requeued
+
+
+def run_worker(poll_interval=None, max_jobs=None, drain=False, should_stop=None):
+    """Process queued analyses until stopped; returns the number processed"""
+    if poll_interval is None:
+        poll_interval = settings.ATS_QUEUE_POLL_INTERVAL
+    processed = 0
+
+    while not (should_stop and should_stop()):
+        if max_jobs is not None and processed >= max_jobs:
+            break
+        analysis = claim_next_analysis()
+        if analysis is None:
+            if requeue_stale_analyses():
+                continue
+            if drain:
+                break
+            time.sleep(poll_interval)
+            continue
+        process_analysis(analysis)
+        processed += 1
+
+    return processed
+
+
+def _discard_upload(analysis):
+    """Delete the temporary upload once it is no longer needed"""
+    if analysis.upload_path and os.path.exists(analysis.upload_path):
+        os.remove(analysis.upload_path)
+        logger.info(f"Temporary file deleted: {analysis.upload_path}")
+    analysis.upload_path = ''
@@ -0,0 +1,111 @@
+"""
+Per-day, per-score-bucket counters for ATS analyses.
+
+Each analysis is added to ATSDailyRollup once, when it finishes (a post_save
+receiver), and flagged ``rolled_up``. Staff analytics read the few hundred
+counter rows instead of grouping millions of analyses, and the counts outlive
+the detailed rows that ``ats_retention`` deletes. Rows from before the
+counters existed are added by ``manage.py ats_rollup_backfill``.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ATSAnalysis, ATSDailyRollup
+
+
+def score_bucket(score):
+    """Histogram bucket for a 0-100 score: tens, with 100 in the top bucket"""
+    if score is None:
+        return ATSDailyRollup.NO_SCORE
+    return min(max(int(score), 0) // 10, 9)
+
+
+def add_to_rollup(day, bucket, analyses, score_total):
+    """Increment one (day, bucket) counter, creating it on first use"""
+    counters = ATSDailyRollup.objects.filter(day=day, bucket=bucket)
+    if counters.update(analyses=F('analyses') + analyses, score_total=F('score_total') + score_total):
+        return
+    try:
+        with transaction.atomic():
+            ATSDailyRollup.objects.create(day=day, bucket=bucket, analyses=analyses, score_total=score_total)
+    except IntegrityError:
+        # Another process created the row first
+        counters.update(analyses=F('analyses') + analyses, score_total=F('score_total') + score_total)
+
+
+def fold_into_rollups(rows):
+    """Add analyses, given as dicts with created_at and score, to the daily counters"""
+    counts = Counter()
+    totals = Counter()
+    for row in rows:
+        key = timezone.localtime(row['created_at']).date(), score_bucket(row['score'])
+        counts[key] += 1
+        totals[key] += row['score'] or 0
+    for (day, bucket), analyses in counts.items():
+        add_to_rollup(day, bucket, analyses, totals[(day, bucket)])
+
+
+def count_finished_analysis(sender, instance, **kwargs):
+    """post_save receiver: add an analysis to the counters once it has finished"""
+    if instance.rolled_up or not instance.is_finished:
+        return
+    with transaction.atomic():
+        # The conditional update claims the row, so concurrent saves count it only once
+        if ATSAnalysis.objects.filter(pk=instance.pk, rolled_up=False).update(rolled_up=True):
+            fold_into_rollups([{'created_at': instance.created_at, 'score': instance.score}])
+    instance.rolled_up = True
+
+
+def roll_up_batch(after_id, batch_size):
+    """Count the next batch of finished analyses not yet in the rollups, walking the primary key
+
+    Returns (last primary key examined, analyses counted); the key is None when no rows are left.
+    """
+    with transaction.atomic():
+        rows = list(ATSAnalysis.objects.filter(id__gt=after_id).order_by('id').select_for_update()
+                    .values('id', 'created_at', 'score', 'status', 'rolled_up')[:batch_size])
+        if not rows:
+            return None, 0
+        pending = [row for row in rows if not row['rolled_up'] and row['status'] in
+                   (ATSAnalysis.STATUS_DONE, ATSAnalysis.STATUS_FAILED)]
+        if pending:
+            ATSAnalysis.objects.filter(id__in=[row['id'] for row in pending]).update(rolled_up=True)
+            fold_into_rollups(pending)
+    return rows[-1]['id'], len(pending)
+
+
+def score_summary(since):
+    """Daily uploads and average scores plus the score distribution from `since` on, read from the rollups"""
+    days = {}
+    distribution = [0] * 10
+    failed = 0
+    rows = ATSDailyRollup.objects.filter(day__gte=since).values_list('day', 'bucket', 'analyses', 'score_total')
+    for day, bucket, analyses, score_total in rows:
+        entry = days.setdefault(day, {'day': day, 'analyses': 0, 'scored': 0, 'score_total': 0})
+        entry['analyses'] += analyses
+        if bucket == ATSDailyRollup.NO_SCORE:
+            failed += analyses
+            continue
+        entry['scored'] += analyses
+        entry['score_total'] += score_total
+        distribution[bucket] += analyses
+
+    days = sorted(days.values(), key=lambda entry: entry['day'])
+    busiest = max([entry['analyses'] for entry in days], default=0)
+    for entry in days:
+        entry['average'] = round(entry['score_total'] / entry['scored'], 1) if entry['scored'] else None
+        entry['width'] = round(100 * entry['analyses'] / busiest) if busiest else 0
+    largest = max(distribution) or 1
+    buckets = [{'label': f'{i * 10}-{i * 10 + 9}' if i < 9 else '90-100', 'analyses': count,
+                'width': round(100 * count / largest)} for i, count in enumerate(distribution)]
+    scored = sum(entry['scored'] for entry in days)
+    return {
+        'days': days,
+        'buckets': buckets,
+        'total': sum(entry['analyses'] for entry in days),
+        'failed': failed,
+        'average': round(sum(entry['score_total'] for entry in days) / scored, 1) if scored else None,
+    }
@@ -0,0 +1,179 @@
+"""
+Isolated resume parsing.
+
+PyPDF2 and python-docx run in a small pool of pre-forked subprocesses rather
+than inside the web worker. Each task has a wall-clock timeout (the
+subprocess is killed and replaced when it is exceeded), each subprocess runs
+under an RLIMIT_AS address-space cap, and subprocesses are recycled after a
+fixed number of tasks so leaked memory is returned to the OS.
+
+``ExtractionPool.extract`` always returns a verdict dict::
+
+    {'status': 'ok' | 'timeout' | 'oom' | 'error', 'text': str, 'stats': dict, 'error': str}
+"""
+import atexit
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+
+from .extraction import extract_text
+
+logger = logging.getLogger('ats')
+
+STATUS_OK = 'ok'
+STATUS_TIMEOUT = 'timeout'
+STATUS_OOM = 'oom'
+STATUS_ERROR = 'error'
+
+
+def _limit_memory(limit_bytes):
+    """Cap this process's address space at its current size plus limit_bytes"""
+    if not limit_bytes:
+        return
+    try:
+        import resource
+        # A forked child already maps everything the parent loaded, so the cap is relative
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        cap = current + limit_bytes
+        resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not apply extraction memory limit: {e}")
+
+
+def _serve(conn, memory_limit):
+    """Subprocess loop: receive (data, file_ext, budget) tasks until told to stop"""
+    _limit_memory(memory_limit)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        data, file_ext, budget = task
+        try:
+            text, stats = extract_text(io.BytesIO(data), file_ext, budget)
+            verdict = {'status': STATUS_OK, 'text': text, 'stats': stats}
+        except MemoryError:
+            verdict = {'status': STATUS_OOM, 'error': 'Memory limit exceeded'}
+        except Exception as e:
+            verdict = {'status': STATUS_ERROR, 'error': str(e)}
+        try:
+            conn.send(verdict)
+        except MemoryError:
+            conn.send({'status': STATUS_OOM, 'error': 'Memory limit exceeded'})
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context, memory_limit):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn, memory_limit),
+                                       name='ats-extract', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        self.dead = False
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Pre-forked pool of extraction subprocesses with hard limits"""
+
+    def __init__(self, size=2, timeout=10.0, memory_limit_mb=256, max_tasks=100):
+        self.size = size
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.max_tasks = max_tasks
+        self._context = multiprocessing.get_context('fork')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = set()
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+        return cls(
+            size=settings.ATS_EXTRACT_POOL_SIZE,
+            timeout=settings.ATS_EXTRACT_TIMEOUT,
+            memory_limit_mb=settings.ATS_EXTRACT_MEMORY_LIMIT_MB,
+            max_tasks=settings.ATS_EXTRACT_MAX_TASKS_PER_WORKER,
+        )
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.memory_limit)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker, kill=False):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(kill=kill)
+
+    def extract(self, data, file_ext, budget=None):
+        """Extract text from raw document bytes in a subprocess and return a verdict"""
+        worker = self._idle.get()
+        try:
+            worker.conn.send((bytes(data), file_ext, budget))
+            if worker.conn.poll(self.timeout):
+                verdict = worker.conn.recv()
+            else:
+                logger.warning(f"Extraction exceeded {self.timeout}s; killing pid {worker.process.pid}")
+                verdict = {'status': STATUS_TIMEOUT, 'error': f'Extraction exceeded {self.timeout}s'}
+                worker.dead = True
+        except (EOFError, BrokenPipeError, OSError):
+            # The subprocess died mid-task; with RLIMIT_AS in place this is almost always memory
+            logger.warning(f"Extraction subprocess {worker.process.pid} died (exit {worker.process.exitcode})")
+            verdict = {'status': STATUS_OOM, 'error': 'Extraction process terminated'}
+            worker.dead = True
+        finally:
+            worker.tasks += 1
+            if worker.dead or worker.tasks >= self.max_tasks:
+                self._retire(worker, kill=worker.dead)
+                worker = self._spawn()
+            self._idle.put(worker)
+        return verdict
+
+    def close(self):
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool():
+    """Return this process's extraction pool, forking it on first use"""
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = ExtractionPool.from_settings()
+                _pool_pid = os.getpid()
+                atexit.register(_pool.close)
+    return _pool
@@ -5,4 +5,9 @@ app_name = 'ats'
 
 urlpatterns = [
     path('checker/', views.ats_checker, name='checker'),
+    path('status/<int:pk>/', views.analysis_status, name='status'),
+    path('history/', views.analysis_history, name='history'),
+    path('api/history/', views.analysis_history_api, name='api_history'),
+    path('api/history/<int:pk>/', views.analysis_detail_api, name='api_history_detail'),
+    path('dashboard/', views.score_dashboard, name='dashboard'),
 ]
@@ -1,74 +1,205 @@
-from django.shortcuts import render, redirect
+from datetime import timedelta
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from django_ratelimit.decorators import ratelimit
+from common.pagination import KeysetPaginator
 from .forms import ResumeUploadForm
 from .models import ATSAnalysis
-from .adapters import get_ats_adapter
-import os
+from .adapters import attach_job_matches, get_ats_adapter, run_adapter
+from .cache import content_hash, get_cached_result, cache_result
+from .payloads import result_fields
+from .queue import enqueue_analysis
+from .rollups import score_summary
+from jobs.matching import resolve_matches
 import logging
 
 logger = logging.getLogger('ats')
 
+# Columns shown in history listings; the suggestion JSON is only read for one analysis at a time
+HISTORY_FIELDS = ('id', 'status', 'score', 'created_at', 'finished_at')
+HISTORY_ORDERING = ['-created_at', '-id']
+
+
+def history_queryset(user):
+    """A user's analyses without the JSON columns, served by the (user, -created_at) index"""
+    return ATSAnalysis.objects.filter(user=user).only(*HISTORY_FIELDS)
+
+
+def history_page(request):
+    """One page of the requesting user's history, newest first, paged by (created_at, id) cursor"""
+    paginator = KeysetPaginator(history_queryset(request.user), settings.ATS_HISTORY_PAGE_SIZE,
+                                HISTORY_ORDERING, numbered_pages=1)
+    return paginator.page(cursor=request.GET.get('cursor'))
+
 @login_required
 @ratelimit(key='user', rate='10/h', method='POST')
 def ats_checker(request):
     """ATS resume score checker view"""
     analysis_result = None
+    pending_analysis = None
     
     if request.method == 'POST':
         form = ResumeUploadForm(request.POST, request.FILES)
         if form.is_valid():
             resume_file = request.FILES['resume']
             
-            # Save file temporarily
-            temp_dir = settings.TEMP_UPLOAD_DIR
-            temp_path = os.path.join(temp_dir, f"{request.user.id}_{resume_file.name}")
-            
-            try:
-                # Write file to temp location
-                with open(temp_path, 'wb+') as destination:
-                    for chunk in resume_file.chunks():
-                        destination.write(chunk)
-                
-                logger.info(f"Resume uploaded by {request.user.username}: {resume_file.name}")
-                
-                # Get ATS adapter and analyze
-                adapter = get_ats_adapter()
-                result = adapter.analyze(temp_path)
-                
-                # Save analysis to database (metadata only, not file)
-                analysis = ATSAnalysis.objects.create(
-                    user=request.user,
-                    score=result['score'],
-                    suggestions_json=result
-                )
-                
-                logger.info(f"ATS analysis complete for {request.user.username}: Score {result['score']}")
-                
-                analysis_result = result
-                messages.success(request, f'Resume analyzed successfully! Your ATS score: {result["score"]}/100')
-                
-            except Exception as e:
-                logger.error(f"ATS analysis error: {e}")
-                messages.error(request, 'An error occurred while analyzing your resume. Please try again.')
-            
-            finally:
-                # CRITICAL: Delete temporary file immediately
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                    logger.info(f"Temporary file deleted: {temp_path}")
+            if settings.ATS_QUEUE_ENABLED:
+                try:
+                    analysis = enqueue_analysis(request.user, resume_file)
+                except Exception as e:
+                    logger.error(f"ATS enqueue error: {e}")
+                    messages.error(request, 'An error occurred while uploading your resume. Please try again.')
+                else:
+                    logger.info(f"Resume uploaded by {request.user.username}: {resume_file.name}")
+                    messages.info(request, 'Resume received! Your analysis will appear here in a few seconds.')
+                    return redirect(f"{request.path}?analysis={analysis.pk}")
+            else:
+                analysis_result = _analyze_now(request, resume_file)
     else:
         form = ResumeUploadForm()
+        analysis_id = request.GET.get('analysis', '')
+        if analysis_id.isdigit():
+            analysis = get_object_or_404(ATSAnalysis.objects.select_related('payload'),
+                                         pk=analysis_id, user=request.user)
+            if analysis.status == ATSAnalysis.STATUS_DONE:
+                analysis_result = analysis.result
+            elif analysis.status == ATSAnalysis.STATUS_FAILED:
+                messages.error(request, 'We could not analyze your resume. Please try again.')
+            else:
+                pending_analysis = analysis
     
     # Get user's recent analyses
-    recent_analyses = ATSAnalysis.objects.filter(user=request.user)[:5]
+    recent_analyses = history_queryset(request.user).order_by(*HISTORY_ORDERING)[:5]
+    
+    job_matches = []
+    if analysis_result and analysis_result.get('job_matches'):
+        job_matches = resolve_matches(analysis_result['job_matches'])
     
     context = {
         'form': form,
         'analysis_result': analysis_result,
+        'job_matches': job_matches,
+        'pending_analysis': pending_analysis,
         'recent_analyses': recent_analyses,
     }
     
     return render(request, 'ats/checker.html', context)
+
+
+def _analyze_now(request, resume_file):
+    """Analyze an upload inside the request and return the adapter result"""
+    try:
+        logger.info(f"Resume uploaded by {request.user.username}: {resume_file.name}")
+        
+        # Reuse the result of an identical earlier upload if we have one
+        adapter = get_ats_adapter()
+        digest = content_hash(resume_file)
+        result = get_cached_result(adapter, digest)
+        
+        if result is None:
+            # Hand the upload straight to the adapter; nothing is written to disk
+            result = run_adapter(adapter, resume_file)
+            cache_result(adapter, digest, result)
+        # Matches are never cached: postings come and go while the score stays valid
+        result = attach_job_matches(result)
+        
+        # Save analysis to database (metadata only, not file)
+        ATSAnalysis.objects.create(
+            **result_fields(result),
+            user=request.user,
+            content_hash=digest,
+        )
+        
+        logger.info(f"ATS analysis complete for {request.user.username}: Score {result['score']}")
+        
+        messages.success(request, f'Resume analyzed successfully! Your ATS score: {result["score"]}/100')
+        return result
+        
+    except Exception as e:
+        logger.error(f"ATS analysis error: {e}")
+        messages.error(request, 'An error occurred while analyzing your resume. Please try again.')
+    
+    return None
+
+
+@login_required
+@require_GET
+def analysis_status(request, pk):
+    """Lightweight polling endpoint for queued analyses"""
+    analysis = get_object_or_404(
+        ATSAnalysis.objects.only('id', 'user_id', 'status', 'score'),
+        pk=pk, user=request.user
+    )
+    return JsonResponse({
+        'id': analysis.pk,
+        'status': analysis.status,
+        'score': analysis.score,
+        'finished': analysis.is_finished,
+    })
+
+
+@login_required
+@require_GET
+def analysis_history(request):
+    """Paged list of the user's past analyses; each links to its full result on the checker page"""
+    return render(request, 'ats/history.html', {'page_obj': history_page(request), 'filter_query': ''})
+
+
+@login_required
+@require_GET
+def analysis_history_api(request):
+    """JSON page of the user's past analyses without their suggestions"""
+    page = history_page(request)
+    return JsonResponse({
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'results': [{
+            'id': analysis.pk,
+            'status': analysis.status,
+            'score': analysis.score,
+            'created_at': analysis.created_at,
+            'finished_at': analysis.finished_at,
+            'detail_url': reverse('ats:api_history_detail', args=[analysis.pk]),
+        } for analysis in page],
+    })
+
+
+@login_required
+@require_GET
+def analysis_detail_api(request, pk):
+    """Full result of one of the user's analyses, loaded on demand"""
+    analysis = get_object_or_404(ATSAnalysis.objects.select_related('payload'), pk=pk, user=request.user)
+    return JsonResponse({
+        'id': analysis.pk,
+        'status': analysis.status,
+        'score': analysis.score,
+        'created_at': analysis.created_at,
+        'finished_at': analysis.finished_at,
+        'result': analysis.result if analysis.status == ATSAnalysis.STATUS_DONE else None,
+    })
+
+
+@staff_member_required
+@require_GET
+def score_dashboard(request):
+    """Score distribution and daily upload/average trends for staff, from the daily rollups"""
+    try:
+        days = min(max(int(request.GET.get('days', 90)), 7), 730)
+    except ValueError:
+        days = 90
+    since = timezone.localdate() - timedelta(days=days - 1)
+    context = {
+        'summary': score_summary(since),
+        'days': days,
+        'since': since,
+        'ranges': [30, 90, 365],
+    }
+    return render(request, 'ats/dashboard.html', context)
@@ -170,11 +170,99 @@ ADMIN_EMAIL = env('ADMIN_EMAIL', default='admin@careersadhana.com')
 # ATS API Configuration
 ATS_API_URL = env('ATS_API_URL', default='')
 ATS_API_KEY = env('ATS_API_KEY', default='')
+ATS_RULES_VERSION = env('ATS_RULES_VERSION', default='1')
+
+# ATS API HTTP client (pooled keep-alive session, retries and circuit breaker)
+ATS_HTTP_POOL_SIZE = env.int('ATS_HTTP_POOL_SIZE', default=10)
+ATS_HTTP_CONNECT_TIMEOUT = env.float('ATS_HTTP_CONNECT_TIMEOUT', default=3.05)  # seconds
+ATS_HTTP_READ_TIMEOUT = env.float('ATS_HTTP_READ_TIMEOUT', default=30)  # seconds
+ATS_HTTP_MAX_RETRIES = env.int('ATS_HTTP_MAX_RETRIES', default=2)
+ATS_HTTP_BACKOFF = env.float('ATS_HTTP_BACKOFF', default=0.5)  # seconds, doubled per retry
+ATS_CIRCUIT_FAILURE_THRESHOLD = env.int('ATS_CIRCUIT_FAILURE_THRESHOLD', default=5)
+ATS_CIRCUIT_RESET_TIMEOUT = env.float('ATS_CIRCUIT_RESET_TIMEOUT', default=30)  # seconds
+ATS_FALLBACK_TO_MOCK = env.bool('ATS_FALLBACK_TO_MOCK', default=True)
+
+# Resume text extraction budget (per upload)
+ATS_EXTRACT_MAX_PAGES = env.int('ATS_EXTRACT_MAX_PAGES', default=20)
+ATS_EXTRACT_MAX_CHARS = env.int('ATS_EXTRACT_MAX_CHARS', default=200000)
+ATS_EXTRACT_MAX_SECONDS = env.float('ATS_EXTRACT_MAX_SECONDS', default=5.0)
+
+# Isolated extraction: parse documents in pre-forked subprocesses with hard limits
+ATS_EXTRACT_ISOLATED = env.bool('ATS_EXTRACT_ISOLATED', default=True)
+ATS_EXTRACT_POOL_SIZE = env.int('ATS_EXTRACT_POOL_SIZE', default=2)  # per web/worker process
+ATS_EXTRACT_TIMEOUT = env.float('ATS_EXTRACT_TIMEOUT', default=10.0)  # seconds, hard kill
+ATS_EXTRACT_MEMORY_LIMIT_MB = env.int('ATS_EXTRACT_MEMORY_LIMIT_MB', default=256)
+ATS_EXTRACT_MAX_TASKS_PER_WORKER = env.int('ATS_EXTRACT_MAX_TASKS_PER_WORKER', default=100)
+
+# Weighted skills taxonomy for mock scoring: a JSON {term: weight} or term,weight CSV file.
+# Empty uses the built-in keyword list.
+ATS_SKILLS_TAXONOMY = env('ATS_SKILLS_TAXONOMY', default='')
+
+# Resume-to-job matching (TF-IDF over active job postings)
+ATS_JOB_MATCHING = env.bool('ATS_JOB_MATCHING', default=True)
+JOB_MATCH_TOP_K = env.int('JOB_MATCH_TOP_K', default=5)
+JOB_MATCH_REFRESH_INTERVAL = env.int('JOB_MATCH_REFRESH_INTERVAL', default=60)  # seconds
+
+# Job listings: pages past this number are reached through keyset cursors, not OFFSET
+JOB_LIST_NUMBERED_PAGES = env.int('JOB_LIST_NUMBERED_PAGES', default=5)
+# Listing counts are cached per filter set; above the limit the planner's estimate is shown
+JOB_COUNT_EXACT_LIMIT = env.int('JOB_COUNT_EXACT_LIMIT', default=10000)
+JOB_COUNT_CACHE_TIMEOUT = env.int('JOB_COUNT_CACHE_TIMEOUT', default=300)  # seconds
+JOB_FACET_LIMIT = env.int('JOB_FACET_LIMIT', default=10)  # values shown per facet
+JOB_API_PAGE_SIZE = env.int('JOB_API_PAGE_SIZE', default=20)
+JOB_API_MAX_PAGE_SIZE = env.int('JOB_API_MAX_PAGE_SIZE', default=100)
+# `python manage.py expire_jobs` deactivates postings this many days past their last date
+JOB_EXPIRE_AFTER_DAYS = env.int('JOB_EXPIRE_AFTER_DAYS', default=30)
+# `python manage.py archive_jobs` moves postings this many days past their last date
+# (private: inactive and untouched for this long) into the archive tables
+JOB_ARCHIVE_AFTER_DAYS = env.int('JOB_ARCHIVE_AFTER_DAYS', default=365)
+# Admin CSV exports stream this many rows per primary-key batch
+JOB_EXPORT_CHUNK_SIZE = env.int('JOB_EXPORT_CHUNK_SIZE', default=2000)
+# Rendered listing pages (anonymous visitors) and job-card fragments; 0 disables.
+# Entries are keyed on a per-model generation, so writes never leave them stale.
+PAGE_CACHE_TIMEOUT = env.int('PAGE_CACHE_TIMEOUT', default=600)  # seconds
+
+# Admin changelists: tables above this many rows show estimated counts and no date drill-down
+ADMIN_COUNT_EXACT_LIMIT = env.int('ADMIN_COUNT_EXACT_LIMIT', default=50000)
+ADMIN_COUNT_CACHE_TIMEOUT = env.int('ADMIN_COUNT_CACHE_TIMEOUT', default=300)  # seconds
+
+# `python manage.py ats_retention` keeps this many detailed analyses per user;
+# older ones are folded into daily score rollups and deleted
+ATS_RETENTION_KEEP = env.int('ATS_RETENTION_KEEP', default=20)
+# Analyses per page of a user's ATS history (/ats/history/ and its JSON API)
+ATS_HISTORY_PAGE_SIZE = env.int('ATS_HISTORY_PAGE_SIZE', default=20)
+
+# ATS Analysis Queue (processed by `python manage.py ats_worker`)
+ATS_QUEUE_ENABLED = env.bool('ATS_QUEUE_ENABLED', default=False)
+ATS_QUEUE_WORKERS = env.int('ATS_QUEUE_WORKERS', default=2)
+ATS_QUEUE_POLL_INTERVAL = env.float('ATS_QUEUE_POLL_INTERVAL', default=2.0)  # seconds
+ATS_QUEUE_MAX_ATTEMPTS = env.int('ATS_QUEUE_MAX_ATTEMPTS', default=3)
+ATS_QUEUE_STALE_AFTER = env.int('ATS_QUEUE_STALE_AFTER', default=300)  # seconds
+
+# Caches
+# default holds the per-model generation counters that invalidate cached pages, cards and counts
+# (common.generations); it must be shared by all gunicorn workers and management commands, so a
+# process-local backend fails the common.E001 system check
+# ats_results holds content-addressed ATS results; point it at a shared backend
+# (e.g. dbcache://ats_result_cache or memcache://) so all workers see the same entries
+ATS_RESULT_CACHE_TIMEOUT = env.int('ATS_RESULT_CACHE_TIMEOUT', default=7 * 24 * 3600)  # seconds
+ATS_RESULT_CACHE_MAX_ENTRIES = env.int('ATS_RESULT_CACHE_MAX_ENTRIES', default=5000)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    'ats_results': env.cache('ATS_RESULT_CACHE_URL', default='locmemcache://ats-results'),
+}
+CACHES['ats_results'].setdefault('TIMEOUT', ATS_RESULT_CACHE_TIMEOUT)
+CACHES['ats_results'].setdefault('OPTIONS', {}).setdefault('MAX_ENTRIES', ATS_RESULT_CACHE_MAX_ENTRIES)
 
 # File Upload Settings
 MAX_UPLOAD_SIZE = env('MAX_UPLOAD_SIZE', default=5242880)  # 5MB
 ALLOWED_RESUME_TYPES = ['application/pdf', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword']
 TEMP_UPLOAD_DIR = BASE_DIR / 'uploads' / 'temp'
+# Hash uploads while they stream in so repeated resumes hit the ATS result cache
+FILE_UPLOAD_HANDLERS = [
+    'ats.cache.HashingMemoryFileUploadHandler',
+    'ats.cache.HashingTemporaryFileUploadHandler',
+]
 
 # Create upload directory if it doesn't exist
 TEMP_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
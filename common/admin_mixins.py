@@ -0,0 +1,43 @@
+"""
+Changelist settings for admin pages over very large tables.
+
+Django's changelist counts the filtered rows, counts the whole table again for
+"N results (M total)", and runs a DISTINCT over the date column for the
+date_hierarchy links. Each of those reads every row, so once a table is larger
+than ADMIN_COUNT_EXACT_LIMIT the counts become planner estimates, the total is
+dropped and the date drill-down is hidden (date filters in the URL still apply).
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .counting import cached_count, count_rows
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is exact up to ADMIN_COUNT_EXACT_LIMIT rows and estimated above"""
+
+    @cached_property
+    def count(self):
+        return count_rows(self.object_list, settings.ADMIN_COUNT_EXACT_LIMIT)[0]
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin mixin that keeps changelists from counting or scanning whole tables"""
+    paginator = EstimatedCountPaginator
+
+    def table_is_large(self):
+        count, estimated = cached_count(self.model._default_manager.all(), {'admin': 'table'},
+                                        exact_limit=settings.ADMIN_COUNT_EXACT_LIMIT,
+                                        timeout=settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return estimated or count > settings.ADMIN_COUNT_EXACT_LIMIT
+
+    @property
+    def show_full_result_count(self):
+        return not self.table_is_large()
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        if changelist.date_hierarchy and self.table_is_large():
+            changelist.date_hierarchy = None
+        return changelist
@@ -0,0 +1,24 @@
+"""
+System checks for settings the common helpers depend on.
+"""
+from django.conf import settings
+from django.core import checks
+
+# Backends whose entries live inside a single process
+PROCESS_LOCAL_CACHES = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_default_cache(app_configs, **kwargs):
+    """Generation counters must be visible to every web worker and management command"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [checks.Error(
+            f'The default cache backend {backend} is local to each process',
+            hint='Cached listing pages, cards and counts are invalidated through generation counters in '
+                 'the default cache; with a per-process cache, writes from other workers and from '
+                 'management commands never reach them. Set CACHE_URL to a shared backend, '
+                 'e.g. pymemcache://127.0.0.1:11211.',
+            id='common.E001',
+        )]
+    return []
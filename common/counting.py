@@ -0,0 +1,111 @@
+"""
+Row counts for filtered listings.
+
+A listing's count (and its facet counts) is computed once per request and
+cached per normalized filter key and model generation (see common.generations). The exact count is
+capped at ``exact_limit + 1`` rows; when the cap is hit, the planner's row
+estimate is used instead of scanning the whole match set.
+
+Cached counts are only exact while the default cache is shared by every
+process that writes jobs (the ``common.E001`` check); an estimate is a
+display value and must not be used to bound page links.
+"""
+import json
+import logging
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Max
+
+from .generations import versioned_key
+
+logger = logging.getLogger(__name__)
+
+
+def _mysql_estimate(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        columns = [col[0].lower() for col in cursor.description]
+        row = dict(zip(columns, cursor.fetchone()))
+    return int((row.get('rows') or 0) * float(row.get('filtered') or 100) / 100)
+
+
+def _postgresql_estimate(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+# vendor -> function(queryset) returning the planner's row estimate
+ESTIMATORS = {
+    'mysql': _mysql_estimate,
+    'postgresql': _postgresql_estimate,
+}
+
+
+def count_rows(queryset, exact_limit):
+    """Return (count, estimated), counting exactly up to exact_limit rows"""
+    capped = queryset.order_by()[:exact_limit + 1].count()
+    if capped <= exact_limit:
+        return capped, False
+    estimator = ESTIMATORS.get(connections[queryset.db].vendor)
+    if estimator is not None:
+        try:
+            return max(estimator(queryset.order_by()), capped), True
+        except Exception as e:
+            logger.warning(f"Row estimate failed, counting exactly: {e}")
+    return queryset.count(), False
+
+
+def cached_count(queryset, filters, exact_limit, timeout):
+    """Count a filtered queryset, reusing the cached value for the same filters and generation"""
+    key = versioned_key('count', queryset.model, filters)
+    result = cache.get(key)
+    if result is None:
+        result = count_rows(queryset, exact_limit)
+        cache.set(key, result, timeout)
+    return tuple(result)
+
+
+def facet_counts(queryset, facets, limit=10):
+    """Count rows per value of several key fields with one GROUP BY.
+
+    facets maps key field -> label field. Returns {key field: [(key, label, count)]}
+    sorted by count, where label is a representative original value for the key.
+    """
+    key_fields = list(facets)
+    annotations = {f'label_{i}': Max(label_field) for i, label_field in enumerate(facets.values())}
+    groups = queryset.order_by().values(*key_fields).annotate(rows=Count('pk'), **annotations)
+
+    totals = {field: {} for field in key_fields}
+    for group in groups:
+        for i, field in enumerate(key_fields):
+            key = group[field]
+            if not key:
+                continue
+            count, label, label_rows = totals[field].get(key, (0, None, 0))
+            # Label each key with the spelling of its largest group
+            if group['rows'] > label_rows:
+                label, label_rows = group[f'label_{i}'], group['rows']
+            totals[field][key] = (count + group['rows'], label, label_rows)
+
+    return {
+        field: sorted(((key, label, count) for key, (count, label, _) in values.items()),
+                      key=lambda item: (-item[2], item[0]))[:limit]
+        for field, values in totals.items()
+    }
+
+
+def cached_facets(queryset, facets, filters, timeout, limit=10):
+    """facet_counts cached per normalized filters and model generation"""
+    key = versioned_key('facets', queryset.model, {'filters': filters, 'facets': facets, 'limit': limit})
+    result = cache.get(key)
+    if result is None:
+        result = facet_counts(queryset, facets, limit)
+        cache.set(key, result, timeout)
+    return result
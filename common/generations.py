@@ -0,0 +1,85 @@
+"""
+Per-model generation counters.
+
+Cache entries derived from a model's rows include the model's current
+generation in their key. Bumping the generation on every write makes all of
+those entries unreachable at once, so nothing has to be deleted or scanned;
+the stale entries simply age out of the cache.
+
+Signals cover ``save``/``delete``; ``GenerationQuerySet`` covers the bulk
+paths (``update``, ``bulk_create``, ``bulk_update``) that bypass them.
+
+The counters live in the default cache, which must be shared by every web
+worker and management command (enforced by the ``common.E001`` check);
+otherwise a write only invalidates the cache of the process that made it.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import models
+
+
+def generation_key(model):
+    return f"generation:{model._meta.label_lower}"
+
+
+def _fresh_generation():
+    # Seeded from the clock (microseconds) so a counter lost to eviction never reuses an old
+    # value, even when it is re-seeded within the same millisecond
+    return time.time_ns() // 1000
+
+
+def get_generation(model):
+    """Return the model's current generation"""
+    return cache.get_or_set(generation_key(model), _fresh_generation, timeout=None)
+
+
+def bump_generation(model):
+    """Move the model to a new generation, invalidating everything keyed on the old one"""
+    try:
+        return cache.incr(generation_key(model))
+    except ValueError:
+        generation = _fresh_generation()
+        cache.set(generation_key(model), generation, timeout=None)
+        return generation
+
+
+def bump_generation_receiver(sender, **kwargs):
+    """post_save/post_delete receiver"""
+    bump_generation(sender)
+
+
+def versioned_key(prefix, model, params):
+    """Cache key for data derived from model under params, at the model's current generation"""
+    digest = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{prefix}:{model._meta.label_lower}:{get_generation(model)}:{digest}"
+
+
+class GenerationQuerySet(models.QuerySet):
+    """QuerySet whose bulk writes bump the model generation"""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_generation(self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            bump_generation(self.model)
+        return created
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            bump_generation(self.model)
+        return rows
+
+    bulk_update.alters_data = True
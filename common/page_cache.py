@@ -0,0 +1,43 @@
+"""
+Whole-page caching for anonymous visitors.
+
+Pages are stored under ``versioned_key``: the key combines the view's
+normalized parameters with the generation of the model the page lists. A
+write to that model moves it to a new generation, so a cached page is never
+served after the data behind it changed.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .generations import versioned_key
+
+
+def cache_anonymous_page(model, key_params):
+    """Cache a GET view's response for anonymous users for PAGE_CACHE_TIMEOUT seconds.
+
+    key_params(request) returns the normalized parameters the page depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            # Pages with flash messages are one-off; authenticated pages are personal
+            if (not settings.PAGE_CACHE_TIMEOUT or request.method != 'GET'
+                    or request.user.is_authenticated or len(get_messages(request))):
+                return view(request, *args, **kwargs)
+
+            key = versioned_key(f'page:{view.__name__}', model, key_params(request))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapped
+    return decorator
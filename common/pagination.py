@@ -0,0 +1,149 @@
+"""
+Keyset (seek) pagination.
+
+Instead of ``OFFSET n``, each page after the first few is fetched with a
+``WHERE (ordering columns) < (values of the last row seen)`` condition, so
+deep pages cost the same as the first one when the ordering is indexed.
+Cursors are signed, opaque tokens that carry the boundary row's ordering
+values; only the first ``numbered_pages`` pages can be reached by number.
+"""
+import datetime
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterable like a Django Page"""
+
+    def __init__(self, paginator, object_list, number, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1], self.number + 1, forward=True)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0], self.number - 1, forward=False)
+        return None
+
+    @property
+    def page_range(self):
+        """Page numbers that may be linked directly"""
+        return self.paginator.page_range
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the boundary row of the previous page"""
+
+    def __init__(self, queryset, per_page, ordering, numbered_pages=5, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.numbered_pages = numbered_pages
+        self.count = count
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self._salt = f"keyset:{queryset.model._meta.label}:{','.join(self.ordering)}"
+
+    @property
+    def page_range(self):
+        pages = self.numbered_pages
+        if self.count is not None:
+            pages = min(pages, max(1, -(-self.count // self.per_page)))
+        return range(1, pages + 1)
+
+    def encode_cursor(self, obj, number, forward=True):
+        # Rows may be model instances or values() dicts
+        values = [obj[field] if isinstance(obj, dict) else getattr(obj, field) for field in self.fields]
+        values = [value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+                  for value in values]
+        # Signer adds no timestamp, so the same boundary row always yields the same token
+        return signing.Signer(salt=self._salt).sign_object({'v': values, 'n': number, 'f': forward},
+                                                           compress=True)
+
+    def decode_cursor(self, token):
+        """Return (values, page number, forward) or None for a missing or tampered token"""
+        if not token:
+            return None
+        try:
+            data = signing.Signer(salt=self._salt).unsign_object(token)
+            if len(data['v']) != len(self.fields):
+                return None
+            opts = self.queryset.model._meta
+            values = [opts.get_field(field).to_python(value) for field, value in zip(self.fields, data['v'])]
+            return values, int(data['n']), bool(data['f'])
+        except (signing.BadSignature, ValidationError, ValueError, TypeError, KeyError):
+            return None
+
+    def _seek(self, values, forward):
+        """Rows strictly after (forward) or before the boundary in the paginator's ordering"""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            term = Q(**{f'{self.fields[i]}__{lookup}': values[i]})
+            for prior in range(i):
+                term &= Q(**{self.fields[prior]: values[prior]})
+            condition |= term
+        # The redundant bound on the leading column lets the planner walk one index range in
+        # order instead of merging one lookup per OR branch and sorting the result
+        lookup = 'lte' if self.ordering[0].startswith('-') == forward else 'gte'
+        return Q(**{f'{self.fields[0]}__{lookup}': values[0]}) & condition
+
+    def page(self, number=None, cursor=None):
+        """Fetch a page by cursor token, or by number within the numbered range"""
+        decoded = self.decode_cursor(cursor)
+        if decoded is not None:
+            values, number, forward = decoded
+            # Cursor pages always follow at least one page
+            number = max(number, 2)
+            if forward:
+                rows = list(self.queryset.filter(self._seek(values, True))
+                            .order_by(*self.ordering)[:self.per_page + 1])
+                return KeysetPage(self, rows[:self.per_page], number,
+                                  has_next=len(rows) > self.per_page, has_previous=True)
+            reverse = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+            rows = list(self.queryset.filter(self._seek(values, False))
+                        .order_by(*reverse)[:self.per_page + 1])
+            if len(rows) <= self.per_page:
+                # Walked back to the start; serve the canonical first page
+                return self.page(1)
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(self, rows, number, has_next=True, has_previous=True)
+
+        # Numbered pages use OFFSET, which stays cheap because the range is small
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        number = min(max(number, 1), self.numbered_pages)
+        offset = (number - 1) * self.per_page
+        rows = list(self.queryset.order_by(*self.ordering)[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            return self.page(1)
+        return KeysetPage(self, rows[:self.per_page], number,
+                          has_next=len(rows) > self.per_page, has_previous=number > 1)
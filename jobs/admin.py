@@ -1,51 +1,149 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import GovernmentJob, PrivateJob
-import csv
-from django.http import HttpResponse
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.urls import path, reverse
+from django.utils import timezone
+from .models import GovernmentJob, GovernmentJobArchive, PrivateJob, PrivateJobArchive
+from common.admin_mixins import LargeTableAdminMixin
+from common.counting import facet_counts
+from common.exports import csv_response, iter_values
+
+
+class NormalizedKeyFilter(admin.SimpleListFilter):
+    """List filter over a normalized key column, offering the most common values"""
+    key_field = None
+    label_field = None
+    limit = 25
+
+    def lookups(self, request, model_admin):
+        # One GROUP BY instead of a DISTINCT over the raw column. The choices are cached for a
+        # fixed time rather than per generation, so saves and imports don't re-run it each load
+        model = model_admin.model
+        cache_key = f'admin-filter:{model._meta.label_lower}:{self.key_field}'
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = facet_counts(model.objects.all(), {self.key_field: self.label_field},
+                                  limit=self.limit)[self.key_field]
+            cache.set(cache_key, facets, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return [(key, f'{label} ({count})') for key, label, count in facets]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.key_field: self.value()})
+        return queryset
+
+
+class LocationFilter(NormalizedKeyFilter):
+    title = 'location'
+    parameter_name = 'location_key'
+    key_field = 'location_key'
+    label_field = 'location'
+
+
+class EducationFilter(NormalizedKeyFilter):
+    title = 'education'
+    parameter_name = 'education_key'
+    key_field = 'education_key'
+    label_field = 'education'
+
+
+class QualificationFilter(NormalizedKeyFilter):
+    title = 'qualification'
+    parameter_name = 'qualification_key'
+    key_field = 'qualification_key'
+    label_field = 'qualification'
+
+
+class CSVExportMixin:
+    """Streaming CSV export of the selected rows or of everything the changelist filters match"""
+    change_list_template = 'admin/jobs/change_list_export.html'
+    export_fields = []
+    export_header = []
+    export_filename = 'export.csv'
+
+    def export_response(self, queryset):
+        rows = iter_values(queryset, self.export_fields, chunk_size=settings.JOB_EXPORT_CHUNK_SIZE)
+        return csv_response(self.export_filename, self.export_header, rows)
+
+    def export_as_csv(self, request, queryset):
+        return self.export_response(queryset)
+    export_as_csv.short_description = "Export selected as CSV"
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('export/', self.admin_site.admin_view(self.export_view), name='%s_%s_export' % info),
+        ] + super().get_urls()
+
+    def export_view(self, request):
+        """Export every row matching the changelist's current filters and search"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            info = self.model._meta.app_label, self.model._meta.model_name
+            return HttpResponseRedirect(reverse('admin:%s_%s_changelist' % info) + '?e=1')
+        return self.export_response(changelist.get_queryset(request))
+
 
 @admin.register(GovernmentJob)
-class GovernmentJobAdmin(admin.ModelAdmin):
+class GovernmentJobAdmin(LargeTableAdminMixin, CSVExportMixin, admin.ModelAdmin):
     list_display = ['post_name', 'company', 'location', 'total_posts', 'last_date', 'is_active']
-    list_filter = ['is_active', 'last_date', 'location']
+    list_filter = ['is_active', 'last_date', LocationFilter, EducationFilter]
     search_fields = ['company', 'post_name', 'location']
     date_hierarchy = 'last_date'
     actions = ['export_as_csv', 'mark_inactive']
+    export_fields = ['company', 'post_name', 'education', 'total_posts', 'location', 'last_date', 'apply_link']
+    export_header = ['Company', 'Post Name', 'Education', 'Total Posts', 'Location', 'Last Date', 'Apply Link']
+    export_filename = 'government_jobs.csv'
     
     def mark_inactive(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        # Bump updated_at too: archive_jobs and the API's Last-Modified read it
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(request, f'{updated} jobs marked as inactive')
     mark_inactive.short_description = "Mark selected jobs as inactive"
-    
-    def export_as_csv(self, request, queryset):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="government_jobs.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['Company', 'Post Name', 'Education', 'Total Posts', 'Location', 'Last Date', 'Apply Link'])
-        for job in queryset:
-            writer.writerow([job.company, job.post_name, job.education, job.total_posts, 
-                           job.location, job.last_date, job.apply_link])
-        return response
-    export_as_csv.short_description = "Export selected as CSV"
 
 @admin.register(PrivateJob)
-class PrivateJobAdmin(admin.ModelAdmin):
+class PrivateJobAdmin(LargeTableAdminMixin, CSVExportMixin, admin.ModelAdmin):
     list_display = ['role', 'company_name', 'location', 'salary', 'experience', 'is_active']
-    list_filter = ['is_active', 'location']
+    list_filter = ['is_active', LocationFilter, QualificationFilter]
     search_fields = ['company_name', 'role', 'location']
     actions = ['export_as_csv', 'mark_inactive']
+    export_fields = ['company_name', 'role', 'salary', 'location', 'qualification', 'experience', 'apply_link']
+    export_header = ['Company Name', 'Role', 'Salary', 'Location', 'Qualification', 'Experience', 'Apply Link']
+    export_filename = 'private_jobs.csv'
     
     def mark_inactive(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        # Bump updated_at too: archive_jobs and the API's Last-Modified read it
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(request, f'{updated} jobs marked as inactive')
     mark_inactive.short_description = "Mark selected jobs as inactive"
-    
-    def export_as_csv(self, request, queryset):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="private_jobs.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['Company Name', 'Role', 'Salary', 'Location', 'Qualification', 'Experience', 'Apply Link'])
-        for job in queryset:
-            writer.writerow([job.company_name, job.role, job.salary, job.location,
-                           job.qualification, job.experience, job.apply_link])
-        return response
-    export_as_csv.short_description = "Export selected as CSV"
+
+
+class ArchiveAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Read-only, searchable view of postings moved out by `archive_jobs`"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(GovernmentJobArchive)
+class GovernmentJobArchiveAdmin(ArchiveAdmin):
+    list_display = ['post_name', 'company', 'location', 'total_posts', 'last_date', 'archived_at']
+    list_filter = ['last_date']
+    search_fields = ['company', 'post_name', 'location', 'apply_link']
+    date_hierarchy = 'last_date'
+
+
+@admin.register(PrivateJobArchive)
+class PrivateJobArchiveAdmin(ArchiveAdmin):
+    list_display = ['role', 'company_name', 'location', 'salary', 'created_at', 'archived_at']
+    list_filter = ['created_at']
+    search_fields = ['company_name', 'role', 'location', 'apply_link']
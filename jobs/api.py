@@ -0,0 +1,132 @@
+"""
+Read-only JSON API for job listings.
+
+Accepts the same search and filter parameters as the HTML listings, plus
+``fields=`` (comma-separated) to project the response. Rows are fetched with
+``values()``, so no model instances are built. Every response carries an
+ETag derived from the filtered set's latest ``updated_at`` and its row count,
+and a Last-Modified from the latest ``updated_at`` in the table; a matching
+conditional GET gets a 304 before any rows are read or serialized.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from common.pagination import KeysetPaginator
+from .models import GovernmentJob, PrivateJob
+from .views import filter_government_jobs, filter_private_jobs
+
+API_FIELDS = {
+    GovernmentJob: ('id', 'company', 'post_name', 'education', 'total_posts', 'location',
+                    'last_date', 'apply_link', 'created_at', 'updated_at', 'days_remaining', 'is_expired'),
+    PrivateJob: ('id', 'company_name', 'role', 'salary', 'location', 'qualification',
+                 'experience', 'apply_link', 'created_at', 'updated_at'),
+}
+
+
+# API field -> (with_deadlines annotation, conversion of its value)
+DEADLINE_FIELDS = {
+    'days_remaining': ('deadline_delta', lambda delta: max(delta.days, 0)),
+    'is_expired': ('deadline_passed', bool),
+}
+
+
+def _requested_fields(request, model):
+    """Fields named in ?fields=, defaulting to all public fields; None if any is unknown"""
+    allowed = API_FIELDS[model]
+    names = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+    if not names:
+        return list(allowed)
+    if any(name not in allowed for name in names):
+        return None
+    return list(dict.fromkeys(names))
+
+
+def _api_page_size(request):
+    try:
+        size = int(request.GET.get('page_size', settings.JOB_API_PAGE_SIZE))
+    except ValueError:
+        size = settings.JOB_API_PAGE_SIZE
+    return min(max(size, 1), settings.JOB_API_MAX_PAGE_SIZE)
+
+
+def _serialize(row, fields):
+    result = {}
+    for field in fields:
+        if field in DEADLINE_FIELDS:
+            annotation, convert = DEADLINE_FIELDS[field]
+            result[field] = convert(row[annotation])
+        else:
+            result[field] = row[field]
+    return result
+
+
+def job_list_api(request, model, jobs):
+    """Serialize a filtered job queryset as a projected, cursor-paginated JSON page"""
+    fields = _requested_fields(request, model)
+    if fields is None:
+        return JsonResponse({'error': 'Unknown field', 'allowed_fields': API_FIELDS[model]}, status=400)
+
+    # Validators come from one aggregate; the representation also depends on the query
+    # string and, through the deadline fields, on the date
+    state = jobs.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    validator = f"{request.GET.urlencode()}|{timezone.now().date()}|{state['last_modified']}|{state['count']}"
+    etag = f'"{hashlib.md5(validator.encode()).hexdigest()}"'
+    # A deactivated posting leaves the filtered set, so Last-Modified is taken over the
+    # whole table (deactivation bumps updated_at; the updated_at index makes this a lookup)
+    changed = model.objects.order_by().aggregate(changed=Max('updated_at'))['changed']
+    # Whole seconds, like If-Modified-Since, or an unchanged listing never compares equal
+    last_modified = int(changed.timestamp()) if changed else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        page_size = _api_page_size(request)
+        columns = [DEADLINE_FIELDS[field][0] if field in DEADLINE_FIELDS else field for field in fields]
+        if request.GET.get('q'):
+            # Relevance-ranked search results page by number, like the HTML listing
+            paginator = Paginator(jobs.values(*columns), page_size)
+            paginator.count = state['count']
+            page = paginator.get_page(request.GET.get('page'))
+            cursors = {'next_cursor': None, 'previous_cursor': None}
+        else:
+            ordering = list(model._meta.ordering) + ['-id']
+            # Ordering columns are needed to build cursors even when not requested
+            columns = list(dict.fromkeys(columns + [field.lstrip('-') for field in ordering]))
+            paginator = KeysetPaginator(jobs.values(*columns), page_size, ordering,
+                                        numbered_pages=settings.JOB_LIST_NUMBERED_PAGES, count=state['count'])
+            page = paginator.page(number=request.GET.get('page'), cursor=request.GET.get('cursor'))
+            cursors = {'next_cursor': page.next_cursor, 'previous_cursor': page.previous_cursor}
+        response = JsonResponse({
+            'count': state['count'],
+            'page': page.number,
+            **cursors,
+            'results': [_serialize(row, fields) for row in page],
+        })
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
+
+
+@require_GET
+def government_jobs_api(request):
+    """JSON listing of active government jobs"""
+    today = timezone.now().date()
+    jobs, _ = filter_government_jobs(request, today)
+    return job_list_api(request, GovernmentJob, jobs.with_deadlines(today))
+
+
+@require_GET
+def private_jobs_api(request):
+    """JSON listing of active private jobs"""
+    jobs, _ = filter_private_jobs(request)
+    return job_list_api(request, PrivateJob, jobs)
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
     verbose_name = 'Job Listings'
+
+    def ready(self):
+        from common.generations import bump_generation_receiver
+        from .models import GovernmentJob, PrivateJob
+        from .search import ensure_search_indexes
+        # Django has no FULLTEXT/FTS5 index type, so the search index is created after migrate
+        post_migrate.connect(ensure_search_indexes, sender=self)
+        # Cached listing counts are keyed on the model generation
+        for model in (GovernmentJob, PrivateJob):
+            post_save.connect(bump_generation_receiver, sender=model)
+            post_delete.connect(bump_generation_receiver, sender=model)
@@ -0,0 +1,95 @@
+"""
+Move long-dead job postings out of the live tables into the archive tables.
+
+Government postings are archived once their last date is older than the
+retention window; private postings once they are inactive and have not been
+updated within it. Each batch is copied and deleted in one transaction, so
+the command can be stopped at any point and simply run again to resume.
+
+Run periodically (e.g. weekly from cron):
+    python manage.py archive_jobs [--after-days 365] [--batch-size 500] [--pause 0.5] [--dry-run]
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from common.generations import bump_generation
+from jobs.models import GovernmentJob, GovernmentJobArchive, PrivateJob, PrivateJobArchive
+
+ARCHIVE_FIELDS = {
+    GovernmentJob: ['company', 'post_name', 'education', 'total_posts', 'location', 'last_date', 'apply_link',
+                    'created_at', 'updated_at'],
+    PrivateJob: ['company_name', 'role', 'salary', 'location', 'qualification', 'experience', 'apply_link',
+                 'created_at', 'updated_at'],
+}
+ARCHIVE_MODELS = {GovernmentJob: GovernmentJobArchive, PrivateJob: PrivateJobArchive}
+
+
+def archivable(model, after_days):
+    """Live postings past the retention window, in the order they are archived"""
+    if model is GovernmentJob:
+        cutoff = timezone.now().date() - timedelta(days=after_days)
+        return model.objects.filter(last_date__lt=cutoff).order_by('last_date', 'id')
+    cutoff = timezone.now() - timedelta(days=after_days)
+    # Deactivation (mark_inactive, expire_jobs) bumps updated_at, so this is time since deactivation
+    return model.objects.filter(is_active=False, updated_at__lt=cutoff).order_by('id')
+
+
+def delete_ids(model, ids):
+    """DELETE the given primary keys with one statement, without per-row post_delete signals"""
+    qn = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {qn(model._meta.db_table)} WHERE {qn(model._meta.pk.column)} "
+                       f"IN ({placeholders})", ids)
+
+
+def archive_batch(model, queryset, batch_size):
+    """Copy and delete one batch in a single transaction; returns the number of postings moved"""
+    archive_model = ARCHIVE_MODELS[model]
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values('id', *ARCHIVE_FIELDS[model])[:batch_size])
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        archive_model.objects.bulk_create([archive_model(original_id=row.pop('id'), **row) for row in rows])
+        delete_ids(model, ids)
+    # One generation bump per batch instead of one per deleted row
+    bump_generation(model)
+    return len(ids)
+
+
+class Command(BaseCommand):
+    help = 'Move job postings past the retention window into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-days', type=int, default=settings.JOB_ARCHIVE_AFTER_DAYS,
+                            help='Retention window in days')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Postings moved per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many postings would be archived')
+
+    def handle(self, *args, **options):
+        for model in (GovernmentJob, PrivateJob):
+            queryset = archivable(model, options['after_days'])
+            label = model._meta.verbose_name_plural
+            if options['dry_run']:
+                self.stdout.write(f'{label}: {queryset.count()} postings would be archived')
+                continue
+
+            total = 0
+            while True:
+                moved = archive_batch(model, queryset, options['batch_size'])
+                if not moved:
+                    break
+                total += moved
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'{label}: archived {total} postings'))
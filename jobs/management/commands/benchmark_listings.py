@@ -0,0 +1,60 @@
+"""
+Check the query plans and timings of every job listing, search and filter combination.
+
+Drives the harness in tests/listing_plans.py, so it needs a source checkout
+that includes the tests package. Run against a disposable database (it inserts
+and deletes rows):
+    python manage.py benchmark_listings [--seed 200000] [--private 100000] [--repeat 3] [--cleanup]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from tests import listing_plans
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every listing query over a seeded catalogue and fail on full scans or filesorts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Government postings to insert before measuring')
+        parser.add_argument('--private', type=int, default=None,
+                            help='Private postings to insert (defaults to half of --seed)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk insert')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Uncached renders per shape; the median is reported')
+        parser.add_argument('--cleanup', action='store_true',
+                            help='Delete the seeded postings afterwards')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the plan of every statement, not only failing ones')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            private = options['private'] if options['private'] is not None else options['seed'] // 2
+            created = listing_plans.seed_catalogue(options['seed'], private, options['batch_size'])
+            self.stdout.write(f'Seeded {created} postings')
+        else:
+            listing_plans.analyze_tables()
+
+        failures = 0
+        try:
+            for name, url_name, params, deep, ranked in listing_plans.listing_shapes():
+                median_ms, statements = listing_plans.run_shape(url_name, params, deep, ranked, options['repeat'])
+                problems = [(sql, plan, found) for sql, plan, found in statements if found]
+                status = self.style.ERROR('FAIL') if problems else self.style.SUCCESS('ok')
+                self.stdout.write(f'{status:>4} {median_ms:8.1f} ms  {len(statements)} queries  {name}')
+                for sql, plan, found in statements:
+                    if found or options['verbose_plans']:
+                        self.stdout.write(f'      {sql}')
+                        for row in plan:
+                            self.stdout.write(f'        {row}')
+                        for problem in found:
+                            self.stdout.write(self.style.WARNING(f'        -> {problem}'))
+                failures += len(problems)
+        finally:
+            if options['cleanup']:
+                self.stdout.write(f'Removed {listing_plans.remove_seeded()} seeded postings')
+
+        if failures:
+            raise CommandError(f'{failures} listing queries scan a whole table or sort outside an index')
+        self.stdout.write(self.style.SUCCESS('All listing queries use an index for filtering and ordering'))
@@ -0,0 +1,49 @@
+"""
+Deactivate government job postings whose deadline passed long ago.
+
+Run periodically (e.g. nightly from cron):
+    python manage.py expire_jobs [--after-days 30] [--batch-size 500] [--dry-run]
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import GovernmentJob
+
+
+class Command(BaseCommand):
+    help = 'Mark government jobs inactive once their last date is more than N days old'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-days', type=int, default=settings.JOB_EXPIRE_AFTER_DAYS,
+                            help='Days past the last date before a posting is deactivated')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows updated per statement')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many postings would be deactivated')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now().date() - timedelta(days=options['after_days'])
+        stale = GovernmentJob.objects.active().filter(last_date__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{stale.count()} postings with last date before {cutoff} would be deactivated')
+            return
+
+        total = 0
+        while True:
+            # Small primary-key batches keep each UPDATE's locks short
+            ids = list(stale.order_by('last_date', 'id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            total += GovernmentJob.objects.filter(id__in=ids, is_active=True).update(
+                is_active=False, updated_at=timezone.now())
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Deactivated {total} postings with last date before {cutoff}'))
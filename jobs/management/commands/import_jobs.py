@@ -0,0 +1,153 @@
+"""
+Stream a CSV or JSON Lines feed of job postings into the database.
+
+Rows are validated one at a time and upserted in batches keyed on the hash of
+the normalized apply link, so re-running an updated feed refreshes postings
+instead of duplicating them. The file is never loaded into memory as a whole.
+
+Usage:
+    python manage.py import_jobs government notifications.csv [--batch-size 1000] [--dry-run]
+    python manage.py import_jobs private feed.jsonl
+    gunzip -c dump.jsonl.gz | python manage.py import_jobs government - --format jsonl
+"""
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from jobs.models import GovernmentJob, PrivateJob
+
+# Columns read from the feed; anything else in a row is ignored
+IMPORT_FIELDS = {
+    'government': (GovernmentJob, ['company', 'post_name', 'education', 'total_posts', 'location',
+                                   'last_date', 'apply_link', 'is_active']),
+    'private': (PrivateJob, ['company_name', 'role', 'salary', 'location', 'qualification', 'experience',
+                             'apply_link', 'is_active']),
+}
+
+# Written on insert and refreshed when a posting is imported again
+KEY_FIELDS = {
+    GovernmentJob: ['location_key', 'education_key'],
+    PrivateJob: ['location_key', 'qualification_key'],
+}
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, dict) pairs from a CSV or JSON Lines text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+            continue
+        yield line_number, row if isinstance(row, dict) else ValueError('expected a JSON object')
+
+
+def build_job(model, fields, row):
+    """Validate one feed row and return an unsaved job; raises ValidationError"""
+    values = {}
+    for field in fields:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            if field == 'is_active':
+                continue  # keep the model default
+            value = ''
+        values[field] = value
+    job = model(**values)
+    job.full_clean(exclude=['apply_link_hash'], validate_unique=False, validate_constraints=False)
+    # Also sets apply_link_hash, which keys the batch below
+    job.normalize_keys()
+    return job
+
+
+def upsert(model, fields, jobs):
+    """Insert new postings and update the ones whose apply link hash already exists"""
+    # is_active is only set on insert, so postings deactivated in the admin stay hidden
+    update_fields = [field for field in fields if field != 'is_active'] + KEY_FIELDS[model] + ['updated_at']
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['apply_link_hash']
+    with transaction.atomic():
+        model.objects.bulk_create(jobs, **options)
+
+
+class Command(BaseCommand):
+    help = 'Validate and upsert job postings from a CSV or JSON Lines file, deduplicated on the apply link'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORT_FIELDS), help='Type of postings in the feed')
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for standard input")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Feed format (defaults to the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows upserted per statement')
+        parser.add_argument('--max-errors', type=int, default=20,
+                            help='Invalid rows to print before only counting them')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the feed without writing anything')
+
+    def handle(self, *args, **options):
+        model, fields = IMPORT_FIELDS[options['kind']]
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(f'Cannot read {path}: {e}')
+
+        started = time.perf_counter()
+        read = invalid = duplicates = written = 0
+        with stream:
+            rows = read_rows(stream, fmt)
+            while True:
+                chunk = list(itertools.islice(rows, options['batch_size']))
+                if not chunk:
+                    break
+                # Later rows win when a link repeats within a batch; one statement
+                # cannot insert and then update the same key
+                batch = {}
+                for line_number, row in chunk:
+                    read += 1
+                    try:
+                        if isinstance(row, Exception):
+                            raise ValidationError(str(row))
+                        job = build_job(model, fields, row)
+                    except ValidationError as e:
+                        invalid += 1
+                        if invalid <= options['max_errors']:
+                            messages = e.message_dict if hasattr(e, 'error_dict') else e.messages
+                            self.stderr.write(f'Line {line_number}: {messages}')
+                        continue
+                    if job.apply_link_hash in batch:
+                        duplicates += 1
+                    batch[job.apply_link_hash] = job
+                if batch and not options['dry_run']:
+                    upsert(model, fields, list(batch.values()))
+                written += len(batch)
+
+        elapsed = time.perf_counter() - started
+        rate = read / elapsed if elapsed else 0
+        verb = 'Validated' if options['dry_run'] else 'Upserted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {written} {model._meta.verbose_name_plural} from {read} rows in {elapsed:.1f}s '
+            f'({rate:.0f} rows/s); {invalid} invalid, {duplicates} repeated links'))
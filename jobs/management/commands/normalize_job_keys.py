@@ -0,0 +1,64 @@
+"""
+Fill or refresh the normalized location/qualification keys and the apply link
+hash on existing jobs.
+
+Rows whose apply link normalizes to one another row already holds keep a NULL
+hash and are reported, so the duplicates can be merged or deleted by hand;
+import_jobs would otherwise insert a third copy instead of updating them.
+
+Usage: python manage.py normalize_job_keys [--batch-size 1000]
+"""
+from django.core.management.base import BaseCommand
+
+from jobs.models import GovernmentJob, PrivateJob
+
+KEY_FIELDS = {
+    GovernmentJob: ['location_key', 'education_key', 'apply_link_hash'],
+    PrivateJob: ['location_key', 'qualification_key', 'apply_link_hash'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Recompute normalized location and qualification keys and apply link hashes for all job postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows read and updated per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, key_fields in KEY_FIELDS.items():
+            changed = 0
+            duplicates = []
+            last_id = 0
+            while True:
+                # Walk the primary key instead of OFFSET so each batch is an index range scan
+                batch = list(model.objects.filter(id__gt=last_id).order_by('id')[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                stale = []
+                for job in batch:
+                    before = [getattr(job, field) for field in key_fields]
+                    job.normalize_keys()
+                    if [getattr(job, field) for field in key_fields] != before:
+                        stale.append(job)
+                # The hash is unique, so a link another row already owns cannot be written
+                taken = set(model.objects
+                            .filter(apply_link_hash__in=[job.apply_link_hash for job in stale])
+                            .exclude(id__in=[job.id for job in stale])
+                            .values_list('apply_link_hash', flat=True))
+                for job in stale:
+                    if job.apply_link_hash in taken:
+                        duplicates.append(job.id)
+                        job.apply_link_hash = None
+                    else:
+                        taken.add(job.apply_link_hash)
+                if stale:
+                    model.objects.bulk_update(stale, key_fields)
+                    changed += len(stale)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: updated keys on {changed} rows'))
+            if duplicates:
+                self.stderr.write(f'{model._meta.verbose_name_plural} sharing an apply link with an earlier '
+                                  f'row, left without a hash: {duplicates}')
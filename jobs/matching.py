@@ -0,0 +1,209 @@
+"""
+Resume-to-job matching.
+
+Keeps a TF-IDF matrix over every active GovernmentJob and PrivateJob in
+compressed sparse row form (NumPy ``indptr``/``indices``/``data`` arrays),
+so scoring a resume against the whole catalogue is one sparse
+matrix-vector product. The index is refreshed incrementally: only postings
+whose ``updated_at`` moved (or that appeared or disappeared from the active
+set) are re-tokenized before the arrays are reassembled.
+"""
+import logging
+import math
+from collections import Counter
+import re
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import GovernmentJob, PrivateJob
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*[+#]*")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from in is it of on or the to with
+""".split())
+
+# kind -> (model, title field, (other text fields)); titles are weighted double
+SOURCES = {
+    'government': (GovernmentJob, 'post_name', ('education', 'company')),
+    'private': (PrivateJob, 'role', ('qualification', 'company_name')),
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens with stop words removed"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def resume_terms(text):
+    """Token counts of a resume; enough to match it again later without the text"""
+    return dict(Counter(tokenize(text)))
+
+
+class JobMatchIndex:
+    """Incrementally maintained TF-IDF index over active job postings"""
+
+    def __init__(self):
+        self.vocab = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.rows = {}  # (kind, id) -> (term ids, sublinear term frequencies)
+        self.stamps = {}  # kind -> (max updated_at, active row count)
+        self.row_keys = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self._row_of = np.zeros(0, dtype=np.int64)  # row index of every stored value
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _term_ids(self, tokens, grow):
+        ids = []
+        for token in tokens:
+            term_id = self.vocab.get(token)
+            if term_id is None and grow:
+                term_id = self.vocab[token] = len(self.vocab)
+            if term_id is not None:
+                ids.append(term_id)
+        return ids
+
+    def _vectorize(self, text):
+        ids, counts = np.unique(np.array(self._term_ids(tokenize(text), grow=True), dtype=np.int64),
+                                return_counts=True)
+        return ids, (1 + np.log(counts)).astype(np.float32)
+
+    def _set_row(self, key, row):
+        old = self.rows.pop(key, None)
+        if old is not None:
+            np.subtract.at(self.df, old[0], 1)
+        if row is not None:
+            if len(self.vocab) > len(self.df):
+                self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - len(self.df), dtype=np.int64)])
+            np.add.at(self.df, row[0], 1)
+            self.rows[key] = row
+
+    def refresh(self):
+        """Re-tokenize changed postings and rebuild the sparse matrix; returns rows touched"""
+        with self._lock:
+            touched = 0
+            for kind, (model, title_field, other_fields) in SOURCES.items():
+                active = model.objects.active()
+                stamp = active.aggregate(updated=Max('updated_at'), count=Count('id'))
+                stamp = (stamp['updated'], stamp['count'])
+                previous = self.stamps.get(kind)
+                if stamp == previous:
+                    continue
+
+                active_ids = set(active.values_list('id', flat=True))
+                indexed_ids = {job_id for row_kind, job_id in self.rows if row_kind == kind}
+                for job_id in indexed_ids - active_ids:
+                    self._set_row((kind, job_id), None)
+                    touched += 1
+
+                changed = active
+                if previous is not None and previous[0] is not None:
+                    # Rows edited since the last refresh, plus rows that newly became active
+                    changed = active.filter(updated_at__gt=previous[0]) | active.filter(
+                        id__in=list(active_ids - indexed_ids))
+                for job in changed.values('id', title_field, *other_fields):
+                    text = ' '.join([job[title_field]] * 2 + [job[field] for field in other_fields])
+                    self._set_row((kind, job['id']), self._vectorize(text))
+                    touched += 1
+                self.stamps[kind] = stamp
+
+            if touched or self.refreshed_at is None:
+                self._assemble()
+            self.refreshed_at = time.monotonic()
+            if touched:
+                logger.info(f"Job match index refreshed: {touched} rows, {len(self.row_keys)} total")
+            return touched
+
+    def _assemble(self):
+        """Build L2-normalized TF-IDF CSR arrays from the cached term-frequency rows"""
+        n_rows = len(self.rows)
+        self.idf = (np.log((1 + n_rows) / (1 + self.df)) + 1).astype(np.float32)
+        self.row_keys = list(self.rows)
+        lengths = np.fromiter((len(self.rows[key][0]) for key in self.row_keys), dtype=np.int64, count=n_rows)
+        self.indptr = np.concatenate([[0], np.cumsum(lengths)])
+        if n_rows:
+            self.indices = np.concatenate([self.rows[key][0] for key in self.row_keys])
+            data = np.concatenate([self.rows[key][1] for key in self.row_keys]) * self.idf[self.indices]
+            row_of = np.repeat(np.arange(n_rows), lengths)
+            norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=n_rows))
+            self.data = (data / np.maximum(norms, 1e-12)[row_of]).astype(np.float32)
+            self._row_of = row_of
+        else:
+            self.indices = np.zeros(0, dtype=np.int64)
+            self.data = np.zeros(0, dtype=np.float32)
+            self._row_of = np.zeros(0, dtype=np.int64)
+
+    def query(self, text, k=5):
+        """Return [(kind, id, cosine score)] for the k best matching postings"""
+        return self.query_terms(resume_terms(text), k)
+
+    def query_terms(self, terms, k=5):
+        """query() for token counts from resume_terms()"""
+        with self._lock:
+            return self._query(terms, k)
+
+    def _query(self, terms, k):
+        n_rows = len(self.row_keys)
+        if not n_rows:
+            return []
+        known = [(self.vocab[token], count) for token, count in terms.items()
+                 if self.vocab.get(token, len(self.idf)) < len(self.idf)]
+        if not known:
+            return []
+        ids = np.array([term_id for term_id, _ in known], dtype=np.int64)
+        counts = np.array([count for _, count in known], dtype=np.float32)
+        vector = np.zeros(len(self.idf), dtype=np.float32)
+        vector[ids] = (1 + np.log(counts)) * self.idf[ids]
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+
+        # Sparse matrix-vector product: sum data * vector[col] per row
+        scores = np.bincount(self._row_of, weights=self.data * vector[self.indices], minlength=n_rows)
+        k = min(k, n_rows)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(*self.row_keys[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+_index = JobMatchIndex()
+
+
+def match_jobs(text, k=None):
+    """Return the top-k job postings for resume text as [{'kind', 'id', 'score'}]"""
+    return match_terms(resume_terms(text), k)
+
+
+def match_terms(terms, k=None):
+    """match_jobs() for token counts from resume_terms(), against the current index"""
+    interval = settings.JOB_MATCH_REFRESH_INTERVAL
+    if _index.refreshed_at is None or time.monotonic() - _index.refreshed_at >= interval:
+        _index.refresh()
+    k = k or settings.JOB_MATCH_TOP_K
+    return [{'kind': kind, 'id': job_id, 'score': round(score, 4)}
+            for kind, job_id, score in _index.query_terms(terms, k)]
+
+
+def resolve_matches(matches):
+    """Load the still-active postings for stored matches, preserving their order"""
+    jobs = {}
+    for kind, (model, _, _) in SOURCES.items():
+        ids = [match['id'] for match in matches if match['kind'] == kind]
+        if ids:
+            for job in model.objects.filter(id__in=ids, is_active=True):
+                jobs[(kind, job.id)] = job
+    resolved = []
+    for match in matches:
+        job = jobs.get((match['kind'], match['id']))
+        if job is not None:
+            resolved.append({'kind': match['kind'], 'job': job,
+                             'percent': math.floor(match['score'] * 100)})
+    return resolved
@@ -2,7 +2,38 @@
 Models for jobs app
 """
 from django.db import models
+from django.db.models import BooleanField, Case, DateField, DurationField, ExpressionWrapper, F, Value, When
 from django.utils import timezone
+from common.generations import GenerationQuerySet
+from .normalization import link_hash, normalize_location, normalize_qualification
+
+
+class JobQuerySet(GenerationQuerySet):
+    """Job queryset that fills normalized keys and the apply link hash on bulk inserts too"""
+
+    def active(self):
+        """Postings shown on the public listings and the API"""
+        return self.filter(is_active=True)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.normalize_keys()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    bulk_create.alters_data = True
+
+
+class GovernmentJobQuerySet(JobQuerySet):
+    def with_deadlines(self, today=None):
+        """Annotate deadline state computed by the database against a single 'today'"""
+        today = today or timezone.now().date()
+        return self.annotate(
+            deadline_delta=ExpressionWrapper(F('last_date') - Value(today, output_field=DateField()),
+                                             output_field=DurationField()),
+            deadline_passed=Case(When(last_date__lt=today, then=Value(True)), default=Value(False),
+                                 output_field=BooleanField()),
+        )
 
 
 class GovernmentJob(models.Model):
@@ -12,37 +43,70 @@ class GovernmentJob(models.Model):
     education = models.CharField(max_length=200, help_text="Required qualification")
     total_posts = models.PositiveIntegerField(help_text="Number of vacancies")
     location = models.CharField(max_length=200, help_text="Job location")
+    location_key = models.CharField(max_length=200, db_index=True, editable=False, default='',
+                                    help_text="Normalized location used for filtering and facets")
+    education_key = models.CharField(max_length=200, db_index=True, editable=False, default='',
+                                     help_text="Normalized qualification used for filtering and facets")
     last_date = models.DateField(help_text="Application deadline")
     apply_link = models.URLField(max_length=500, help_text="Application URL")
+    apply_link_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False,
+                                       help_text="Normalized apply link hash; import_jobs upserts on it")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+
+    # Bulk updates (e.g. the mark_inactive admin action) must also invalidate cached listings
+    objects = GovernmentJobQuerySet.as_manager()
     
     class Meta:
         ordering = ['-last_date', '-created_at']
         verbose_name = 'Government Job'
         verbose_name_plural = 'Government Jobs'
         indexes = [
-            models.Index(fields=['last_date']),
-            models.Index(fields=['location']),
-            models.Index(fields=['is_active']),
+            # Admin changelist order; also serves deadline range filters
+            models.Index(fields=['last_date', 'created_at', 'id'], name='govjob_last_date_idx'),
+            # Latest change anywhere in the table, for the API's Last-Modified
+            models.Index(fields=['updated_at'], name='govjob_updated_idx'),
+            # Listing order plus the id tiebreaker used by keyset pagination
+            models.Index(fields=['is_active', '-last_date', '-created_at', '-id'], name='govjob_listing_idx'),
+            # The same order behind each key filter, so filtered pages never sort
+            models.Index(fields=['is_active', 'location_key', '-last_date', '-created_at', '-id'],
+                         name='govjob_location_idx'),
+            models.Index(fields=['is_active', 'education_key', '-last_date', '-created_at', '-id'],
+                         name='govjob_education_idx'),
+            models.Index(fields=['is_active', 'location_key', 'education_key', '-last_date', '-created_at', '-id'],
+                         name='govjob_location_education_idx'),
         ]
     
     def __str__(self):
         return f"{self.post_name} - {self.company}"
+
+    def normalize_keys(self):
+        self.location_key = normalize_location(self.location)
+        self.education_key = normalize_qualification(self.education)
+        self.apply_link_hash = link_hash(self.apply_link)
+
+    def save(self, *args, **kwargs):
+        self.normalize_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'location_key', 'education_key', 'apply_link_hash'}
+        super().save(*args, **kwargs)
     
     @property
     def is_expired(self):
         """Check if application deadline has passed"""
+        # Rows loaded through with_deadlines() carry the answer already
+        if 'deadline_passed' in self.__dict__:
+            return self.deadline_passed
         return self.last_date < timezone.now().date()
     
     @property
     def days_remaining(self):
         """Calculate days until deadline"""
-        if self.is_expired:
-            return 0
-        delta = self.last_date - timezone.now().date()
-        return delta.days
+        if 'deadline_delta' in self.__dict__:
+            return max(self.deadline_delta.days, 0)
+        return max((self.last_date - timezone.now().date()).days, 0)
 
 
 class PrivateJob(models.Model):
@@ -51,21 +115,101 @@ class PrivateJob(models.Model):
     role = models.CharField(max_length=200, help_text="Job title/role")
     salary = models.CharField(max_length=100, help_text="Salary range (e.g., ₹5-8 LPA)")
     location = models.CharField(max_length=200, help_text="Job location")
+    location_key = models.CharField(max_length=200, db_index=True, editable=False, default='',
+                                    help_text="Normalized location used for filtering and facets")
     qualification = models.CharField(max_length=200, help_text="Required qualification")
+    qualification_key = models.CharField(max_length=200, db_index=True, editable=False, default='',
+                                         help_text="Normalized qualification used for filtering and facets")
     experience = models.CharField(max_length=100, help_text="Experience required (e.g., 2-5 years)")
     apply_link = models.URLField(max_length=500, help_text="Application URL")
+    apply_link_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False,
+                                       help_text="Normalized apply link hash; import_jobs upserts on it")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+
+    # Bulk updates (e.g. the mark_inactive admin action) must also invalidate cached listings
+    objects = JobQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Private Job'
         verbose_name_plural = 'Private Jobs'
         indexes = [
-            models.Index(fields=['location']),
-            models.Index(fields=['is_active']),
+            models.Index(fields=['is_active', '-created_at', '-id'], name='privjob_listing_idx'),
+            # Admin changelist order
+            models.Index(fields=['created_at', 'id'], name='privjob_created_idx'),
+            models.Index(fields=['updated_at'], name='privjob_updated_idx'),
+            models.Index(fields=['is_active', 'location_key', '-created_at', '-id'], name='privjob_location_idx'),
+            models.Index(fields=['is_active', 'qualification_key', '-created_at', '-id'],
+                         name='privjob_qualification_idx'),
+            models.Index(fields=['is_active', 'location_key', 'qualification_key', '-created_at', '-id'],
+                         name='privjob_location_qual_idx'),
         ]
     
     def __str__(self):
         return f"{self.role} - {self.company_name}"
+
+    def normalize_keys(self):
+        self.location_key = normalize_location(self.location)
+        self.qualification_key = normalize_qualification(self.qualification)
+        self.apply_link_hash = link_hash(self.apply_link)
+
+    def save(self, *args, **kwargs):
+        self.normalize_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'location_key', 'qualification_key', 'apply_link_hash'}
+        super().save(*args, **kwargs)
+
+
+class GovernmentJobArchive(models.Model):
+    """Government posting moved out of the live table by `archive_jobs`"""
+    original_id = models.BigIntegerField(db_index=True, help_text="Primary key the posting had while live")
+    company = models.CharField(max_length=200)
+    post_name = models.CharField(max_length=200)
+    education = models.CharField(max_length=200)
+    total_posts = models.PositiveIntegerField()
+    location = models.CharField(max_length=200)
+    last_date = models.DateField()
+    apply_link = models.URLField(max_length=500)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_date']
+        verbose_name = 'Archived Government Job'
+        verbose_name_plural = 'Archived Government Jobs'
+        indexes = [
+            models.Index(fields=['last_date', 'id'], name='govarchive_last_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_name} - {self.company}"
+
+
+class PrivateJobArchive(models.Model):
+    """Private posting moved out of the live table by `archive_jobs`"""
+    original_id = models.BigIntegerField(db_index=True, help_text="Primary key the posting had while live")
+    company_name = models.CharField(max_length=200)
+    role = models.CharField(max_length=200)
+    salary = models.CharField(max_length=100)
+    location = models.CharField(max_length=200)
+    qualification = models.CharField(max_length=200)
+    experience = models.CharField(max_length=100)
+    apply_link = models.URLField(max_length=500)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Archived Private Job'
+        verbose_name_plural = 'Archived Private Jobs'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='privarchive_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.role} - {self.company_name}"
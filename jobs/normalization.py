@@ -0,0 +1,91 @@
+"""
+Canonical keys for free-text job attributes.
+
+Locations and qualifications are typed by hand ("Bengaluru", "Bangalore ",
+"B. Tech", "B.Tech"), so listings are filtered and faceted on normalized keys
+stored next to the original text rather than on the text itself.
+
+Apply links get the same treatment: imports identify a posting by a hash of
+its normalized link, so re-importing a feed updates rows instead of copying them.
+"""
+import hashlib
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+LOCATION_ALIASES = {
+    'bangalore': 'bengaluru',
+    'bombay': 'mumbai',
+    'madras': 'chennai',
+    'calcutta': 'kolkata',
+    'gurgaon': 'gurugram',
+    'new delhi': 'delhi',
+    'delhi ncr': 'delhi',
+    'trivandrum': 'thiruvananthapuram',
+    'pondicherry': 'puducherry',
+    'all india': 'anywhere in india',
+    'pan india': 'anywhere in india',
+}
+
+QUALIFICATION_ALIASES = {
+    'any graduate': 'graduate',
+    'graduation': 'graduate',
+    'bachelors degree': 'graduate',
+    '10th': '10th pass',
+    'matriculation': '10th pass',
+    '12th': '12th pass',
+    'intermediate': '12th pass',
+}
+
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ref', 'source'}
+
+
+def _words(value):
+    value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode().lower()
+    value = value.replace("'", '').replace('.', ' ')
+    return ' '.join(NON_WORD_RE.sub(' ', value).split())
+
+
+def _join_initials(words):
+    """Glue dotted abbreviations back together: 'b tech' -> 'btech', 'm b a' -> 'mba'"""
+    tokens, initials = [], False
+    for word in words.split():
+        if initials and word.isalpha() and (len(word) == 1 or len(tokens[-1]) == 1):
+            tokens[-1] += word
+        else:
+            tokens.append(word)
+        initials = len(word) == 1 and word.isalpha()
+    return ' '.join(tokens)
+
+
+def _key(words, aliases, max_length):
+    return aliases.get(words, words).replace(' ', '-')[:max_length]
+
+
+def normalize_location(value, max_length=200):
+    """Canonical location key, e.g. 'New Delhi' -> 'delhi', 'Tamil Nadu' -> 'tamil-nadu'"""
+    return _key(_words(value), LOCATION_ALIASES, max_length)
+
+
+def normalize_qualification(value, max_length=200):
+    """Canonical qualification key, e.g. 'B. Tech' and 'B.Tech' -> 'btech'"""
+    return _key(_join_initials(_words(value)), QUALIFICATION_ALIASES, max_length)
+
+
+def normalize_link(value):
+    """Canonical apply link: lowercase scheme and host, no fragment, tracking parameters or trailing slash"""
+    parts = urlsplit((value or '').strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted((name, val) for name, val in parse_qsl(parts.query, keep_blank_values=True)
+                   if name.lower() not in TRACKING_PARAMS and not name.lower().startswith('utm_'))
+    return urlunsplit(('https' if parts.scheme.lower() in ('http', 'https') else parts.scheme.lower(),
+                       host, parts.path.rstrip('/'), urlencode(query), ''))
+
+
+def link_hash(value):
+    """SHA-256 hex digest of the normalized apply link"""
+    return hashlib.sha256(normalize_link(value).encode()).hexdigest()
@@ -0,0 +1,57 @@
+"""
+Query-plan parsing for the job listings.
+
+``explain`` runs EXPLAIN on a captured statement and ``plan_problems`` flags
+plans that read a whole table or index, or sort rows outside an index (MySQL
+"ALL"/"index"/"Using filesort"/"Using temporary", SQLite "SCAN <table>" with
+or without an index/"USE TEMP B-TREE", PostgreSQL "Seq Scan"/"Sort").
+
+The harness that seeds a catalogue and drives the listings through these
+checks lives in tests/listing_plans.py.
+"""
+from django.db import connection
+
+from .models import GovernmentJob, PrivateJob
+
+
+def explain(sql):
+    """Return the plan of a captured statement as a list of dict rows"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [{'detail': row[3]} for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return [{'detail': row[0]} for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        columns = [col[0].lower() for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def plan_problems(plan, sort_allowed=False):
+    """Describe full table or index scans and out-of-index sorts in an explain() result"""
+    tables = {GovernmentJob._meta.db_table, PrivateJob._meta.db_table}
+    problems = []
+    for row in plan:
+        if connection.vendor == 'mysql':
+            # "index" walks every entry of an index, which is no cheaper than "ALL" on a big table
+            if row.get('table') in tables and row.get('type') in ('ALL', 'index'):
+                problems.append(f"full {'index ' if row['type'] == 'index' else ''}scan of {row['table']}")
+            extra = row.get('extra') or ''
+            if not sort_allowed and ('Using filesort' in extra or 'Using temporary' in extra):
+                problems.append(f"sort outside an index on {row.get('table')}: {extra}")
+        else:
+            detail = row['detail'].strip()
+            # SCAN is a full pass, with or without USING (COVERING) INDEX; SEARCH seeks
+            if any(detail == f'SCAN {table}' or detail.startswith(f'SCAN {table} ') for table in tables):
+                problems.append(f'full scan: {detail}')
+            if detail.startswith('Seq Scan on') and detail.split()[3] in tables:
+                problems.append(f'full scan: {detail}')
+            if not sort_allowed and ('TEMP B-TREE' in detail or detail.startswith('Sort ')):
+                problems.append(f'sort outside an index: {detail}')
+    return problems
+
+
+def is_aggregate(sql):
+    """Whether a statement is a facet aggregate, which reads every matching row anyway"""
+    return ' GROUP BY ' in sql
@@ -0,0 +1,175 @@
+"""
+Full-text search for job listings.
+
+MySQL uses a FULLTEXT index over the searchable columns and ranks with
+``MATCH ... AGAINST`` in boolean mode; SQLite (tests, local development) uses
+an FTS5 table with the porter stemmer kept in sync by triggers. Both indexes
+are created by ``ensure_search_indexes`` after ``migrate``. On any other
+backend, or when the index is missing, search falls back to per-term
+``icontains`` filters.
+"""
+import logging
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import GovernmentJob, PrivateJob
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = {
+    GovernmentJob: ('company', 'post_name', 'education'),
+    PrivateJob: ('company_name', 'role', 'qualification'),
+}
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# InnoDB ignores tokens shorter than innodb_ft_min_token_size (3 by default)
+MYSQL_MIN_TOKEN = 3
+
+SUFFIXES = ('ing', 'ers', 'er', 'es', 'ed', 's')
+
+
+def search_terms(query):
+    """Split a user query into lowercase word terms"""
+    return [term.lower() for term in TERM_RE.findall(query)][:10]
+
+
+def light_stem(term):
+    """Strip a common English suffix so prefix matching covers inflections"""
+    for suffix in SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= MYSQL_MIN_TOKEN:
+            return term[:-len(suffix)]
+    return term
+
+
+def fulltext_index_name(model):
+    return f"{model._meta.db_table}_fulltext"
+
+
+def fts_table_name(model):
+    return f"{model._meta.db_table}_fts"
+
+
+def search_backend(model, using='default'):
+    """Return 'mysql', 'sqlite' or None for the full-text backend available for model"""
+    connection = connections[using]
+    cache = connection.__dict__.setdefault('_job_search_backends', {})
+    if model not in cache:
+        backend = None
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                    "AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+                    [model._meta.db_table, fulltext_index_name(model)],
+                )
+                backend = 'mysql' if cursor.fetchone() else None
+            elif connection.vendor == 'sqlite':
+                table_names = connection.introspection.table_names(cursor)
+                backend = 'sqlite' if fts_table_name(model) in table_names else None
+        cache[model] = backend
+    return cache[model]
+
+
+def like_filter(queryset, terms):
+    """Require every term to appear in at least one searchable field"""
+    for term in terms:
+        condition = Q()
+        for field in SEARCH_FIELDS[queryset.model]:
+            condition |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def search_jobs(queryset, query):
+    """Filter a job queryset by a free-text query, ranked by relevance when possible"""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    model = queryset.model
+    backend = search_backend(model, queryset.db)
+
+    if backend == 'mysql':
+        indexed = [term for term in terms if len(term) >= MYSQL_MIN_TOKEN]
+        # Short terms ("IT", "HR") are not in the FULLTEXT index but must still match
+        queryset = like_filter(queryset, [term for term in terms if len(term) < MYSQL_MIN_TOKEN])
+        if indexed:
+            columns = ', '.join(connections[queryset.db].ops.quote_name(field) for field in SEARCH_FIELDS[model])
+            against = ' '.join(f'+{light_stem(term)}*' for term in indexed)
+            relevance = RawSQL(f"MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)", [against],
+                               output_field=FloatField())
+            return (queryset.annotate(relevance=relevance)
+                    .filter(relevance__gt=0)
+                    .order_by('-relevance', *model._meta.ordering))
+        return queryset
+
+    if backend == 'sqlite':
+        table = fts_table_name(model)
+        match = ' '.join(f'"{term}"*' for term in terms)
+        matching_ids = RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [match])
+        relevance = RawSQL(
+            f'SELECT -bm25("{table}") FROM "{table}" WHERE "{table}" MATCH %s '
+            f'AND rowid = "{model._meta.db_table}"."id"',
+            [match], output_field=FloatField(),
+        )
+        return (queryset.filter(id__in=matching_ids)
+                .annotate(relevance=relevance)
+                .order_by('-relevance', *model._meta.ordering))
+
+    # No full-text index
+    return like_filter(queryset, terms)
+
+
+def ensure_search_indexes(using='default', **kwargs):
+    """Create the FULLTEXT index (MySQL) or FTS5 table and triggers (SQLite) if missing"""
+    connection = connections[using]
+    for model, fields in SEARCH_FIELDS.items():
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if table not in connection.introspection.table_names(cursor):
+                continue
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                    "AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+                    [table, fulltext_index_name(model)],
+                )
+                if not cursor.fetchone():
+                    columns = ', '.join(f'`{field}`' for field in fields)
+                    cursor.execute(f"ALTER TABLE `{table}` ADD FULLTEXT INDEX "
+                                   f"`{fulltext_index_name(model)}` ({columns})")
+                    logger.info(f"Created FULLTEXT index on {table}")
+            elif connection.vendor == 'sqlite':
+                _ensure_fts5(cursor, table, fts_table_name(model), fields)
+    connection.__dict__.pop('_job_search_backends', None)
+
+
+def _ensure_fts5(cursor, table, fts, fields):
+    columns = ', '.join(fields)
+    new_values = ', '.join(f'new.{field}' for field in fields)
+    old_values = ', '.join(f'old.{field}' for field in fields)
+    try:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{table}', content_rowid='id', tokenize='porter unicode61')"
+        )
+    except Exception as e:
+        logger.warning(f"SQLite FTS5 unavailable, job search will use LIKE: {e}")
+        return
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
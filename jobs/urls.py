@@ -1,9 +1,11 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'jobs'
 
 urlpatterns = [
     path('government/', views.government_jobs, name='government'),
     path('private/', views.private_jobs, name='private'),
+    path('api/government/', api.government_jobs_api, name='api_government'),
+    path('api/private/', api.private_jobs_api, name='api_private'),
 ]
@@ -1,85 +1,204 @@
 """
 Views for jobs app
 """
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.shortcuts import render
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.utils import timezone
+from common.counting import cached_count, cached_facets
+from common.generations import versioned_key
+from common.page_cache import cache_anonymous_page
+from common.pagination import KeysetPaginator
 from .models import GovernmentJob, PrivateJob
+from .normalization import normalize_location, normalize_qualification
+from .search import search_jobs, search_terms
 
+JOBS_PER_PAGE = 15
 
-def government_jobs(request):
-    """Display government job listings with search and filter"""
+
+def listing_filters(request, qualification_param, with_status=True):
+    """Normalized listing filters, so equivalent requests share cache entries"""
+    filters = {
+        'q': ' '.join(search_terms(request.GET.get('q', ''))),
+        'location': normalize_location(request.GET.get('location', '')),
+        qualification_param: normalize_qualification(request.GET.get(qualification_param, '')),
+    }
+    if with_status:
+        status = request.GET.get('status', 'all')
+        filters['status'] = status if status in ('active', 'expired') else 'all'
+    return filters
+
+
+def listing_page_params(request, qualification_param, with_status=True):
+    """Everything a rendered listing page depends on"""
+    return {
+        **listing_filters(request, qualification_param, with_status),
+        'page': request.GET.get('page', ''),
+        'cursor': request.GET.get('cursor', ''),
+        # Deadline badges and the active/expired split change at midnight
+        'today': timezone.now().date(),
+    }
+
+
+def count_jobs(jobs, filters):
+    """Count a filtered listing once, cached per normalized filters; returns (count, estimated)"""
+    return cached_count(jobs, filters, exact_limit=settings.JOB_COUNT_EXACT_LIMIT,
+                        timeout=settings.JOB_COUNT_CACHE_TIMEOUT)
+
+
+def paginate_jobs(request, jobs, ranked, total_jobs, count_estimated=False):
+    """Paginate a listing: keyset cursors for browsing, numbered pages for ranked search results"""
+    if ranked:
+        # Search results are ordered by relevance and bounded, so OFFSET paging is fine
+        paginator = Paginator(jobs, JOBS_PER_PAGE)
+        # Reuse the listing count instead of a second COUNT(*). An estimate may overshoot, so page
+        # links only reach the rows known to exist (an estimate means more than the exact limit)
+        paginator.count = min(total_jobs, settings.JOB_COUNT_EXACT_LIMIT + 1) if count_estimated else total_jobs
+        return paginator.get_page(request.GET.get('page'))
+    ordering = list(jobs.model._meta.ordering) + ['-id']
+    paginator = KeysetPaginator(jobs, JOBS_PER_PAGE, ordering,
+                                numbered_pages=settings.JOB_LIST_NUMBERED_PAGES, count=total_jobs)
+    return paginator.page(number=request.GET.get('page'), cursor=request.GET.get('cursor'))
+
+
+def government_page_params(request):
+    return listing_page_params(request, 'education')
+
+
+def private_page_params(request):
+    return listing_page_params(request, 'qualification', with_status=False)
+
+
+def facet_links(filters, param, entries):
+    """Sidebar entries for one facet, each linking to the listing narrowed to that value"""
+    # Built from the normalized filters, not request.GET: the page is cached under those,
+    # so anything else the first visitor sent would be served to everyone sharing the entry
+    params = {name: value for name, value in filters.items() if name not in (param, 'today') and value}
+    selected = filters[param]
+    links = [{'label': label, 'count': count, 'url': f'?{urlencode({**params, param: key})}',
+              'selected': key == selected}
+             for key, label, count in entries]
+    return {'entries': links, 'clear_url': f'?{urlencode(params)}' if selected else None}
+
+
+def listing_facets(jobs, filters, qualification_field):
+    """Location and qualification facet counts for the current result set"""
+    qualification_key = f'{qualification_field}_key'
+    facets = cached_facets(jobs, {'location_key': 'location', qualification_key: qualification_field},
+                           filters, timeout=settings.JOB_COUNT_CACHE_TIMEOUT, limit=settings.JOB_FACET_LIMIT)
+    return [
+        ('Location', facet_links(filters, 'location', facets['location_key'])),
+        ('Qualification', facet_links(filters, qualification_field, facets[qualification_key])),
+    ]
+
+
+def filter_government_jobs(request, today):
+    """Apply the government listing's search and filter parameters; returns (jobs, filters)"""
     query = request.GET.get('q', '')
-    location = request.GET.get('location', '')
     status = request.GET.get('status', 'all')  # all, active, expired
-    
-    jobs = GovernmentJob.objects.filter(is_active=True)
-    
+    filters = listing_filters(request, 'education')
+
+    jobs = GovernmentJob.objects.active()
+
     # Search filter
     if query:
-        jobs = jobs.filter(
-            Q(company__icontains=query) |
-            Q(post_name__icontains=query) |
-            Q(education__icontains=query)
-        )
-    
-    # Location filter
-    if location:
-        jobs = jobs.filter(location__icontains=location)
-    
+        jobs = search_jobs(jobs, query)
+
+    # Location and qualification filters are equality matches on indexed normalized keys
+    if filters['location']:
+        jobs = jobs.filter(location_key=filters['location'])
+    if filters['education']:
+        jobs = jobs.filter(education_key=filters['education'])
+
     # Status filter
-    from django.utils import timezone
-    today = timezone.now().date()
     if status == 'active':
         jobs = jobs.filter(last_date__gte=today)
     elif status == 'expired':
         jobs = jobs.filter(last_date__lt=today)
-    
+    if filters['status'] != 'all':
+        # Active/expired boundaries move at midnight
+        filters['today'] = today
+
+    return jobs, filters
+
+
+def filter_private_jobs(request):
+    """Apply the private listing's search and filter parameters; returns (jobs, filters)"""
+    query = request.GET.get('q', '')
+    filters = listing_filters(request, 'qualification', with_status=False)
+
+    jobs = PrivateJob.objects.active()
+
+    # Search filter
+    if query:
+        jobs = search_jobs(jobs, query)
+
+    # Location and qualification filters are equality matches on indexed normalized keys
+    if filters['location']:
+        jobs = jobs.filter(location_key=filters['location'])
+    if filters['qualification']:
+        jobs = jobs.filter(qualification_key=filters['qualification'])
+
+    return jobs, filters
+
+
+@cache_anonymous_page(GovernmentJob, government_page_params)
+def government_jobs(request):
+    """Display government job listings with search and filter"""
+    # One 'today' per request for filtering and for the deadline badges
+    today = timezone.now().date()
+    jobs, filters = filter_government_jobs(request, today)
+    # The page is cached under the normalized filters, so it must echo those rather than the raw input
+    query, location, education, status = filters['q'], filters['location'], filters['education'], filters['status']
+
     # Pagination
-    paginator = Paginator(jobs, 15)  # Show 15 jobs per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    total_jobs, count_estimated = count_jobs(jobs, filters)
+    page_obj = paginate_jobs(request, jobs.with_deadlines(today), ranked=bool(query), total_jobs=total_jobs,
+                             count_estimated=count_estimated)
+
     context = {
         'page_obj': page_obj,
         'query': query,
         'location': location,
+        'education': education,
         'status': status,
-        'total_jobs': jobs.count(),
+        'filter_query': urlencode({'q': query, 'location': location, 'education': education, 'status': status}),
+        'total_jobs': total_jobs,
+        'count_estimated': count_estimated,
+        'facets': listing_facets(jobs, filters, 'education'),
+        # Job cards are also cached as a fragment for signed-in users
+        'cards_cache_key': versioned_key('cards', GovernmentJob, government_page_params(request)),
+        'cards_cache_timeout': settings.PAGE_CACHE_TIMEOUT,
     }
-    
+
     return render(request, 'jobs/government.html', context)
 
 
+@cache_anonymous_page(PrivateJob, private_page_params)
 def private_jobs(request):
     """Display private job listings with search and filter"""
-    query = request.GET.get('q', '')
-    location = request.GET.get('location', '')
-    
-    jobs = PrivateJob.objects.filter(is_active=True)
-    
-    # Search filter
-    if query:
-        jobs = jobs.filter(
-            Q(company_name__icontains=query) |
-            Q(role__icontains=query) |
-            Q(qualification__icontains=query)
-        )
-    
-    # Location filter
-    if location:
-        jobs = jobs.filter(location__icontains=location)
-    
+    jobs, filters = filter_private_jobs(request)
+    # The page is cached under the normalized filters, so it must echo those rather than the raw input
+    query, location, qualification = filters['q'], filters['location'], filters['qualification']
+
     # Pagination
-    paginator = Paginator(jobs, 15)  # Show 15 jobs per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    total_jobs, count_estimated = count_jobs(jobs, filters)
+    page_obj = paginate_jobs(request, jobs, ranked=bool(query), total_jobs=total_jobs,
+                             count_estimated=count_estimated)
+
     context = {
         'page_obj': page_obj,
         'query': query,
         'location': location,
-        'total_jobs': jobs.count(),
+        'qualification': qualification,
+        'filter_query': urlencode({'q': query, 'location': location, 'qualification': qualification}),
+        'total_jobs': total_jobs,
+        'count_estimated': count_estimated,
+        'facets': listing_facets(jobs, filters, 'qualification'),
+        'cards_cache_key': versioned_key('cards', PrivateJob, private_page_params(request)),
+        'cards_cache_timeout': settings.PAGE_CACHE_TIMEOUT,
     }
-    
+
     return render(request, 'jobs/private.html', context)
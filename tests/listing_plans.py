@@ -0,0 +1,197 @@
+"""
+Query-plan harness for the job listings.
+
+Seeds a synthetic catalogue with bulk_create, drives every listing, search
+and filter combination through the real views, and checks each SQL
+statement they issue with ``jobs.query_plans``. Relevance-ranked search
+results are the one shape allowed to sort, because the rank is not stored
+anywhere.
+
+Used by ``QueryPlanTest`` in tests/test_jobs.py and by
+``python manage.py benchmark_listings``.
+"""
+import itertools
+import random
+import re
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+
+from common.generations import bump_generation
+from common.pagination import KeysetPaginator
+from jobs.models import GovernmentJob, PrivateJob
+from jobs.query_plans import explain, is_aggregate, plan_problems
+
+SEED_LINK_PREFIX = 'https://seed.invalid/'
+
+# An is_active column standing alone as a WHERE condition
+BARE_BOOLEAN = re.compile(r'((?:WHERE|AND|OR|\() *"\w+"\."is_active")(?= *(?:AND|OR|\)|LIMIT|ORDER|GROUP|$))')
+
+LOCATIONS = ['Delhi', 'New Delhi', 'Mumbai', 'Bangalore', 'Bengaluru', 'Chennai', 'Kolkata', 'Hyderabad',
+             'Pune', 'Lucknow', 'Jaipur', 'Bhopal', 'Patna', 'Guwahati', 'Anywhere in India']
+EDUCATION = ['Graduate', 'B.Tech', 'B. Tech Civil', 'Diploma', '10th Pass', '12th Pass', 'MBA', 'M.Sc',
+             'B.Ed', 'Any Graduate', 'ITI', 'MBBS']
+POSTS = ['Clerk', 'Junior Engineer', 'Assistant Engineer', 'Teacher', 'Constable', 'Forest Guard',
+         'Stenographer', 'Staff Nurse', 'Accountant', 'Technician', 'Scientist', 'Data Entry Operator']
+DEPARTMENTS = ['Railway Board', 'Public Works Department', 'Education Board', 'State Police', 'ISRO',
+               'Health Department', 'Forest Department', 'Income Tax Department', 'High Court']
+ROLES = ['Python Developer', 'Data Analyst', 'Sales Executive', 'Backend Engineer', 'HR Manager',
+         'Accountant', 'Support Engineer', 'Product Manager', 'QA Engineer', 'Content Writer']
+COMPANIES = ['Infosys', 'TCS', 'Wipro', 'Zoho', 'Flipkart', 'Freshworks', 'HCL', 'Swiggy', 'Paytm']
+
+# Filter values exercised for each listing; every combination is checked
+GOVERNMENT_FILTERS = {
+    'q': ['', 'engineer'],
+    'location': ['', 'delhi'],
+    'education': ['', 'graduate'],
+    'status': ['all', 'active', 'expired'],
+}
+PRIVATE_FILTERS = {
+    'q': ['', 'engineer'],
+    'location': ['', 'mumbai'],
+    'qualification': ['', 'btech'],
+}
+
+
+def seed_catalogue(government=200000, private=100000, batch_size=5000, seed=0):
+    """Insert synthetic postings in bulk; returns the number of rows created"""
+    rng = random.Random(seed)
+    today = date.today()
+
+    def government_rows():
+        for i in range(government):
+            yield GovernmentJob(
+                company=rng.choice(DEPARTMENTS), post_name=rng.choice(POSTS), education=rng.choice(EDUCATION),
+                total_posts=rng.randint(1, 500), location=rng.choice(LOCATIONS),
+                last_date=today + timedelta(days=rng.randint(-120, 120)),
+                apply_link=f'{SEED_LINK_PREFIX}government/{i}', is_active=rng.random() > 0.1,
+            )
+
+    def private_rows():
+        for i in range(private):
+            yield PrivateJob(
+                company_name=rng.choice(COMPANIES), role=rng.choice(ROLES), salary='5-8 LPA',
+                location=rng.choice(LOCATIONS), qualification=rng.choice(EDUCATION), experience='2-4 years',
+                apply_link=f'{SEED_LINK_PREFIX}private/{i}', is_active=rng.random() > 0.1,
+            )
+
+    created = 0
+    for model, rows in ((GovernmentJob, government_rows()), (PrivateJob, private_rows())):
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(batch)
+            created += len(batch)
+    analyze_tables()
+    return created
+
+
+def remove_seeded():
+    """Delete the rows created by seed_catalogue"""
+    deleted = 0
+    for model in (GovernmentJob, PrivateJob):
+        # One statement and one generation bump, instead of a post_delete signal per seeded row
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {qn(model._meta.db_table)} "
+                           f"WHERE {qn(model._meta.get_field('apply_link').column)} LIKE %s",
+                           [f'{SEED_LINK_PREFIX}%'])
+            deleted += cursor.rowcount
+        bump_generation(model)
+    return deleted
+
+
+def analyze_tables():
+    """Refresh planner statistics so EXPLAIN reflects the seeded data"""
+    tables = [GovernmentJob._meta.db_table, PrivateJob._meta.db_table]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f"ANALYZE TABLE {', '.join(tables)}")
+            cursor.fetchall()
+        elif connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+        elif connection.vendor == 'postgresql':
+            for table in tables:
+                cursor.execute(f'ANALYZE {table}')
+
+
+def listing_shapes():
+    """Every listing request the suite checks, as (name, url name, params, deep, sort allowed)"""
+    shapes = []
+    for url_name, filters in (('jobs:government', GOVERNMENT_FILTERS), ('jobs:private', PRIVATE_FILTERS)):
+        keys = list(filters)
+        for values in itertools.product(*filters.values()):
+            params = {key: value for key, value in zip(keys, values) if value not in ('', 'all')}
+            name = f"{url_name.split(':')[1]}?{'&'.join(f'{k}={v}' for k, v in params.items()) or 'all'}"
+            ranked = bool(params.get('q'))
+            shapes.append((name, url_name, params, False, ranked))
+            if not ranked:
+                shapes.append((f'{name} (deep cursor)', url_name, params, True, False))
+        shapes.append((f"api {url_name.split(':')[1]}", url_name.replace(':', ':api_'), {}, False, False))
+        shapes.append((f"api {url_name.split(':')[1]} (deep cursor)", url_name.replace(':', ':api_'), {},
+                       True, False))
+    return shapes
+
+
+def as_equality(sql):
+    """Spell a bare boolean condition as the equality MySQL and PostgreSQL are sent"""
+    # Django renders is_active=True as plain `WHERE "is_active"` on SQLite, a term SQLite's
+    # planner cannot seek an index with; the production backends get `is_active = true`
+    if connection.vendor != 'sqlite':
+        return sql
+    return BARE_BOOLEAN.sub(r'\1 = 1', sql)
+
+
+def _deep_cursor(url_name, depth=1000):
+    """A cursor pointing `depth` rows into the unfiltered listing"""
+    model = GovernmentJob if 'government' in url_name else PrivateJob
+    ordering = list(model._meta.ordering) + ['-id']
+    jobs = model.objects.active()
+    row = jobs.order_by(*ordering).values(*[field.lstrip('-') for field in ordering])[depth:depth + 1].first()
+    if row is None:
+        return None
+    if 'api' in url_name:
+        jobs = jobs.values()
+    return KeysetPaginator(jobs, 15, ordering).encode_cursor(row, 2)
+
+
+def run_shape(url_name, params, deep=False, sort_allowed=False, repeat=1):
+    """Render one listing uncached; returns (median ms, [(sql, plan, problems)])"""
+    params = dict(params)
+    if deep:
+        cursor = _deep_cursor(url_name)
+        if cursor:
+            params['cursor'] = cursor
+    model = GovernmentJob if 'government' in url_name else PrivateJob
+    view_url = reverse(url_name)
+    view = resolve(view_url).func
+    factory = RequestFactory()
+
+    timings = []
+    with override_settings(PAGE_CACHE_TIMEOUT=0):
+        for _ in range(repeat):
+            # A new generation makes every cached count and facet unreachable
+            bump_generation(model)
+            request = factory.get(view_url, params)
+            request.user = AnonymousUser()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = view(request)
+                timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, f'{view_url} returned {response.status_code}'
+
+    statements = []
+    for query in captured.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        plan = explain(as_equality(sql))
+        statements.append((sql, plan, plan_problems(plan, sort_allowed or is_aggregate(sql))))
+    return statistics.median(timings), statements
@@ -0,0 +1,730 @@
+"""
+Tests for the ATS resume checker
+Run with: python manage.py test tests.test_ats
+"""
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from ats.adapters import ATSAdapter, MockATSAdapter, analyze_resume, get_ats_adapter
+from ats.client import ATSClient, CircuitBreaker, CircuitOpenError
+from ats.cache import content_hash, result_cache_key
+from ats.extraction import ExtractionBudget, extract_text
+from ats.matching import KeywordMatcher
+from ats.models import ATSAnalysis, ATSDailyRollup, ATSSuggestionPayload
+from ats.payloads import intern_sections, result_fields
+from ats.rollups import add_to_rollup, score_bucket
+from ats.sandbox import ExtractionPool
+from jobs.matching import resolve_matches
+from jobs.models import PrivateJob
+from ats.queue import enqueue_analysis, claim_next_analysis, run_worker
+
+
+def make_resume(name='resume.pdf', content=b'%PDF-1.4\nexperience education skills\n'):
+    return SimpleUploadedFile(name, content, content_type='application/pdf')
+
+
+class ATSQueueTest(TestCase):
+    """Test the database-backed analysis queue"""
+
+    def setUp(self):
+        caches['ats_results'].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='TestPass123!')
+        self.client.login(username='testuser', password='TestPass123!')
+
+    def test_enqueue_creates_pending_analysis(self):
+        analysis = enqueue_analysis(self.user, make_resume())
+        self.assertEqual(analysis.status, ATSAnalysis.STATUS_PENDING)
+        self.assertIsNone(analysis.score)
+        self.assertTrue(os.path.exists(analysis.upload_path))
+        run_worker(drain=True)
+
+    def test_claim_is_exclusive(self):
+        enqueue_analysis(self.user, make_resume())
+        first = claim_next_analysis()
+        self.assertEqual(first.status, ATSAnalysis.STATUS_RUNNING)
+        self.assertEqual(first.attempts, 1)
+        self.assertIsNone(claim_next_analysis())
+        first.status = ATSAnalysis.STATUS_PENDING
+        first.save()
+        run_worker(drain=True)
+
+    def test_worker_completes_analysis_and_deletes_upload(self):
+        analysis = enqueue_analysis(self.user, make_resume())
+        upload_path = analysis.upload_path
+        self.assertEqual(run_worker(drain=True), 1)
+        analysis.refresh_from_db()
+        self.assertEqual(analysis.status, ATSAnalysis.STATUS_DONE)
+        self.assertIsNotNone(analysis.score)
+        self.assertEqual(analysis.result['score'], analysis.score)
+        self.assertEqual(analysis.upload_path, '')
+        self.assertFalse(os.path.exists(upload_path))
+
+    @override_settings(ATS_QUEUE_ENABLED=True)
+    def test_queued_upload_redirects_to_polling_page(self):
+        response = self.client.post(reverse('ats:checker'), {'resume': make_resume()})
+        analysis = ATSAnalysis.objects.get(user=self.user)
+        self.assertRedirects(response, f"{reverse('ats:checker')}?analysis={analysis.pk}")
+
+        response = self.client.get(reverse('ats:checker'), {'analysis': analysis.pk})
+        self.assertContains(response, reverse('ats:status', args=[analysis.pk]))
+
+        run_worker(drain=True)
+        response = self.client.get(reverse('ats:status', args=[analysis.pk]))
+        data = response.json()
+        self.assertEqual(data['status'], ATSAnalysis.STATUS_DONE)
+        self.assertTrue(data['finished'])
+
+    def test_status_endpoint_is_private(self):
+        analysis = enqueue_analysis(self.user, make_resume())
+        User.objects.create_user(username='other', password='TestPass123!')
+        self.client.login(username='other', password='TestPass123!')
+        response = self.client.get(reverse('ats:status', args=[analysis.pk]))
+        self.assertEqual(response.status_code, 404)
+        run_worker(drain=True)
+
+
+class ATSResultCacheTest(TestCase):
+    """Test the content-addressed result cache"""
+
+    def setUp(self):
+        caches['ats_results'].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='TestPass123!')
+        self.client.login(username='testuser', password='TestPass123!')
+
+    def test_upload_is_hashed_while_streaming(self):
+        with mock.patch('ats.views.content_hash', wraps=content_hash) as hasher:
+            self.client.post(reverse('ats:checker'), {'resume': make_resume()})
+        self.assertTrue(hasher.call_args.args[0].content_hash)
+
+    def test_repeated_upload_skips_extraction(self):
+        self.client.post(reverse('ats:checker'), {'resume': make_resume()})
+        with mock.patch.object(MockATSAdapter, '_extract_text') as extract:
+            response = self.client.post(reverse('ats:checker'), {'resume': make_resume()})
+        extract.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+
+        first, second = ATSAnalysis.objects.order_by('id')
+        self.assertEqual(first.content_hash, second.content_hash)
+        self.assertEqual(first.score, second.score)
+
+    def test_cache_key_includes_rules_version(self):
+        adapter = MockATSAdapter()
+        key = result_cache_key(adapter, 'abc')
+        with mock.patch.object(MockATSAdapter, 'RULES_VERSION', 99):
+            self.assertNotEqual(result_cache_key(adapter, 'abc'), key)
+
+    def test_cached_upload_is_not_queued(self):
+        self.client.post(reverse('ats:checker'), {'resume': make_resume()})
+        analysis = enqueue_analysis(self.user, make_resume())
+        self.assertEqual(analysis.status, ATSAnalysis.STATUS_DONE)
+        self.assertEqual(analysis.upload_path, '')
+
+
+def make_docx(*paragraphs):
+    from docx import Document
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class MockAdapterSourceTest(TestCase):
+    """Test that adapters accept paths, streams and in-memory buffers"""
+
+    def setUp(self):
+        self.data = make_docx('Work experience', 'Education and skills', 'Projects')
+        self.adapter = MockATSAdapter()
+
+    def assertSameAnalysis(self, result, expected):
+        self.assertEqual(result['score'], expected['score'])
+        self.assertEqual(result['sections'], expected['sections'])
+        self.assertEqual(result['meta']['matched_keywords'], expected['meta']['matched_keywords'])
+
+    def test_buffer_types_score_identically(self):
+        expected = self.adapter.analyze(self.data, filename='resume.docx')
+        self.assertEqual(expected['meta']['matched_keywords'], 5)
+        self.assertSameAnalysis(self.adapter.analyze(memoryview(self.data), filename='resume.docx'), expected)
+        self.assertSameAnalysis(self.adapter.analyze(io.BytesIO(self.data), filename='resume.docx'), expected)
+        self.assertSameAnalysis(self.adapter.analyze(SimpleUploadedFile('resume.docx', self.data)), expected)
+
+    def test_path_api_still_supported(self):
+        with tempfile.NamedTemporaryFile(suffix='.docx') as f:
+            f.write(self.data)
+            f.flush()
+            result = self.adapter.analyze(f.name)
+        self.assertSameAnalysis(result, self.adapter.analyze(self.data, filename='resume.docx'))
+
+    def test_checker_does_not_write_temp_files(self):
+        User.objects.create_user(username='testuser', password='TestPass123!')
+        self.client.login(username='testuser', password='TestPass123!')
+        caches['ats_results'].clear()
+        with mock.patch.object(MockATSAdapter, 'analyze_document', autospec=True,
+                               side_effect=MockATSAdapter.analyze_document) as analyze:
+            response = self.client.post(reverse('ats:checker'), {'resume': make_resume()})
+        self.assertContains(response, 'Analysis Complete')
+        source = analyze.call_args.args[1]
+        self.assertNotIsInstance(source, (str, os.PathLike))
+        self.assertEqual(source.name, 'resume.pdf')
+
+
+class ExtractionBudgetTest(TestCase):
+    """Test budgeted text extraction"""
+
+    def test_stats_reported_in_meta(self):
+        data = make_docx('Experience', 'Skills')
+        result = MockATSAdapter().analyze(data, filename='resume.docx')
+        stats = result['meta']['extraction']
+        self.assertEqual(stats['bytes'], len(data))
+        self.assertEqual(stats['chars'], len('Experience') + len('Skills'))
+        self.assertIsNone(stats['truncated'])
+        self.assertIn('ms', stats)
+
+    def test_character_budget_truncates(self):
+        data = make_docx('a' * 50, 'b' * 50, 'c' * 50)
+        text, stats = extract_text(io.BytesIO(data), '.docx', ExtractionBudget(max_chars=70))
+        self.assertEqual(text, 'a' * 50 + '\n' + 'b' * 20)
+        self.assertEqual(stats['truncated'], 'chars')
+
+    def test_page_budget_stops_iteration(self):
+        pages = iter(['page one ', 'page two ', 'page three '])
+        with mock.patch.dict('ats.extraction.PART_READERS', {'.pdf': lambda stream: (3, pages)}):
+            text, stats = extract_text(io.BytesIO(), '.pdf', ExtractionBudget(max_pages=2))
+        self.assertEqual(text, 'page one page two ')
+        self.assertEqual(stats['pages'], 2)
+        self.assertEqual(stats['truncated'], 'pages')
+        self.assertEqual(next(pages), 'page three ')
+
+    def test_unparseable_file_yields_empty_text(self):
+        text, stats = extract_text(io.BytesIO(b'not a pdf'), '.pdf')
+        self.assertEqual(text, '')
+        self.assertIn('error', stats)
+
+
+class KeywordMatcherTest(TestCase):
+    """Test the single-pass keyword matcher"""
+
+    def setUp(self):
+        self.matcher = KeywordMatcher({
+            'python': 2, 'machine learning': 3, 'c++': 1, 'node.js': 1, 'work': 1,
+        })
+
+    def test_counts_and_positions(self):
+        text = 'python, machine learning and more python'
+        hits = self.matcher.find(text)
+        self.assertEqual(hits['python'], [0, text.rindex('python')])
+        self.assertEqual(hits['machine learning'], [8])
+
+    def test_respects_word_boundaries(self):
+        self.assertEqual(self.matcher.count('networking pythonic machine'), {})
+        self.assertEqual(self.matcher.count('c++ and node.js at work.'),
+                         {'c++': 1, 'node.js': 1, 'work': 1})
+
+    def test_hyphens_and_dots_separate_words(self):
+        matcher = KeywordMatcher({'management': 1, 'front-end': 1, 'node.js': 1})
+        self.assertEqual(matcher.count('project-management lead'), {'management': 1})
+        self.assertEqual(matcher.count('front end and front-end'), {'front-end': 2})
+        self.assertEqual(matcher.count('node js, node.js'), {'node.js': 2})
+
+    def test_symbol_terms(self):
+        matcher = KeywordMatcher({'c++': 1, 'c#': 1, 'c': 1, '.net': 1, 'asp.net': 1})
+        self.assertEqual(matcher.count('c++, c# and c'), {'c++': 1, 'c#': 1, 'c': 1})
+        self.assertEqual(matcher.count('.net core; asp.net mvc'), {'.net': 1, 'asp.net': 1})
+
+    def test_weights(self):
+        hits = self.matcher.count('python and machine learning')
+        self.assertEqual(self.matcher.weight(hits), 5)
+
+    def test_adapter_uses_injected_matcher(self):
+        adapter = MockATSAdapter(matcher=self.matcher)
+        result = adapter.analyze(make_docx('Python and machine learning'), filename='resume.docx')
+        self.assertEqual((result['meta']['matched_keywords'], result['meta']['keyword_weight']), (2, 5))
+        self.assertNotIn('keyword_hits', result['meta'])
+        self.assertEqual(result['meta']['total_keywords'], 5)
+        self.assertNotEqual(adapter.rules_version, MockATSAdapter().rules_version)
+
+
+class StandInATSHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the ATS vendor API"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        server.requests.append((self.client_address, self.headers['Authorization']))
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = json.dumps({'score': 88, 'sections': [], 'meta': {}}).encode()
+        if server.bodies:
+            body = server.bodies.pop(0)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ATSClientTest(TestCase):
+    """Test the pooled ATS API client against a local stand-in server"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInATSHandler)
+        self.server.requests = []
+        self.server.statuses = []
+        self.server.bodies = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/analyze'
+
+    def make_client(self, **kwargs):
+        kwargs.setdefault('backoff', 0)
+        client = ATSClient(self.url, 'secret', **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_reuses_keep_alive_connection(self):
+        client = self.make_client()
+        for _ in range(3):
+            self.assertEqual(client.analyze('resume.pdf', io.BytesIO(b'%PDF'))['score'], 88)
+        addresses = {address for address, _ in self.server.requests}
+        self.assertEqual(len(addresses), 1)
+        self.assertEqual(self.server.requests[0][1], 'Bearer secret')
+
+    def test_retries_transient_errors(self):
+        self.server.statuses = [503, 502]
+        client = self.make_client(max_retries=2)
+        self.assertEqual(client.analyze('resume.pdf', io.BytesIO(b'%PDF'))['score'], 88)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_circuit_opens_and_fails_fast(self):
+        self.server.statuses = [503] * 4
+        client = self.make_client(max_retries=1, breaker=CircuitBreaker(failure_threshold=2))
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                client.analyze('resume.pdf', io.BytesIO(b'%PDF'))
+        with self.assertRaises(CircuitOpenError):
+            client.analyze('resume.pdf', io.BytesIO(b'%PDF'))
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_adapter_falls_back_to_mock_when_circuit_open(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        adapter = ATSAdapter(client=self.make_client(breaker=breaker))
+        result = adapter.analyze(make_docx('Work experience'), filename='resume.docx')
+        self.assertTrue(result['meta']['fallback'])
+        self.assertEqual(self.server.requests, [])
+
+    def test_half_open_allows_trial_call(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        client = self.make_client(breaker=breaker)
+        self.assertEqual(client.analyze('resume.pdf', io.BytesIO(b'%PDF'))['score'], 88)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_rejected_with_4xx_closes_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.server.statuses = [400]
+        client = self.make_client(breaker=breaker)
+        with self.assertRaises(requests.HTTPError):
+            client.analyze('resume.pdf', io.BytesIO(b'%PDF'))
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(client.analyze('resume.pdf', io.BytesIO(b'%PDF'))['score'], 88)
+
+    def test_half_open_trial_with_bad_json_reopens_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        breaker.opened_at -= 60
+        self.server.bodies = [b'not json']
+        client = self.make_client(breaker=breaker)
+        with self.assertRaises(ValueError):
+            client.analyze('resume.pdf', io.BytesIO(b'%PDF'))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_factory_returns_process_wide_adapter(self):
+        with override_settings(ATS_API_URL=self.url, ATS_API_KEY='secret'):
+            adapter = get_ats_adapter()
+            self.assertIsInstance(adapter, ATSAdapter)
+            self.assertIs(get_ats_adapter(), adapter)
+        self.assertIsInstance(get_ats_adapter(), MockATSAdapter)
+
+
+def slow_reader(stream):
+    time.sleep(30)
+    return 0, iter([])
+
+
+def greedy_reader(stream):
+    hog = bytearray(1024 * 1024 * 1024)
+    return 1, iter([str(len(hog))])
+
+
+class ExtractionPoolTest(TestCase):
+    """Test the isolated extraction subprocess pool"""
+
+    def make_pool(self, **kwargs):
+        pool = ExtractionPool(size=1, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_extracts_text_in_subprocess(self):
+        pool = self.make_pool()
+        verdict = pool.extract(make_docx('Work experience'), '.docx')
+        self.assertEqual(verdict['status'], 'ok')
+        self.assertEqual(verdict['text'], 'Work experience')
+
+    def test_timeout_kills_and_replaces_worker(self):
+        with mock.patch.dict('ats.extraction.PART_READERS', {'.pdf': slow_reader}):
+            pool = self.make_pool(timeout=0.5)
+        pid = next(iter(pool._workers)).process.pid
+        self.assertEqual(pool.extract(b'%PDF', '.pdf')['status'], 'timeout')
+        self.assertNotEqual(next(iter(pool._workers)).process.pid, pid)
+
+    def test_memory_cap_yields_oom_verdict(self):
+        with mock.patch.dict('ats.extraction.PART_READERS', {'.pdf': greedy_reader}):
+            pool = self.make_pool(memory_limit_mb=64)
+        self.assertEqual(pool.extract(b'%PDF', '.pdf')['status'], 'oom')
+        self.assertEqual(pool.extract(make_docx('Skills'), '.docx')['status'], 'ok')
+
+    def test_workers_recycled_after_max_tasks(self):
+        pool = self.make_pool(max_tasks=2)
+        pids = set()
+        for _ in range(3):
+            pids.add(next(iter(pool._workers)).process.pid)
+            pool.extract(make_docx('Skills'), '.docx')
+        self.assertEqual(len(pids), 2)
+
+    def test_adapter_reports_verdict(self):
+        with mock.patch('ats.adapters.get_extraction_pool') as get_pool:
+            get_pool.return_value.extract.return_value = {'status': 'timeout', 'error': 'slow'}
+            result = MockATSAdapter().analyze(b'%PDF', filename='resume.pdf')
+        self.assertEqual(result['meta']['extraction']['verdict'], 'timeout')
+        self.assertEqual(result['sections'][0]['name'], 'Readability')
+
+
+class ATSBatchCommandTest(TestCase):
+    """Test the bulk scoring management command"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.archive = os.path.join(self.tmp.name, 'resumes.zip')
+        with zipfile.ZipFile(self.archive, 'w') as archive:
+            archive.writestr('a.docx', make_docx('Work experience'))
+            archive.writestr('b.docx', make_docx('Skills and projects'))
+            archive.writestr('notes.txt', 'ignored')
+
+    def test_scores_archive_to_jsonl(self):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('ats_batch', self.archive, workers=2, stdout=out, stderr=err)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sorted(line['file'] for line in lines), ['a.docx', 'b.docx'])
+        self.assertTrue(all('score' in line for line in lines))
+        self.assertIn('p95', err.getvalue())
+
+    def test_saves_analyses_for_user(self):
+        user = User.objects.create_user(username='placement')
+        call_command('ats_batch', self.archive, workers=2, save_for='placement',
+                     batch_size=1, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(ATSAnalysis.objects.filter(user=user).count(), 2)
+
+
+@override_settings(JOB_MATCH_REFRESH_INTERVAL=0, ATS_EXTRACT_ISOLATED=False)
+class ResumeJobMatchTest(TestCase):
+    """Test that analyses carry matching job postings"""
+
+    def test_analysis_includes_job_matches(self):
+        job = PrivateJob.objects.create(
+            company_name='Infosys', role='Python Developer', salary='5-8 LPA', location='Pune',
+            qualification='B.Tech', experience='2 years', apply_link='http://example.com/apply'
+        )
+        result = analyze_resume(MockATSAdapter(), make_docx('Python developer with B.Tech'),
+                                filename='resume.docx')
+        self.assertEqual(result['job_matches'][0]['id'], job.id)
+        self.assertEqual(resolve_matches(result['job_matches'])[0]['job'], job)
+
+
+    @override_settings(JOB_MATCH_REFRESH_INTERVAL=0)
+    def test_cache_hit_recomputes_matches(self):
+        caches['ats_results'].clear()
+        user = User.objects.create_user(username='matcher', password='TestPass123!')
+        upload = lambda: SimpleUploadedFile('resume.docx', make_docx('Python developer with B.Tech'))
+        first = enqueue_analysis(user, upload())
+        run_worker(drain=True)
+        first.refresh_from_db()
+        self.assertEqual(first.result.get('job_matches', []), [])
+
+        job = PrivateJob.objects.create(
+            company_name='Infosys', role='Python Developer', salary='5-8 LPA', location='Pune',
+            qualification='B.Tech', experience='2 years', apply_link='http://example.com/apply'
+        )
+        # Served from the result cache, but matched against today's postings
+        second = enqueue_analysis(user, upload())
+        self.assertEqual(second.status, ATSAnalysis.STATUS_DONE)
+        self.assertEqual(second.result['job_matches'][0]['id'], job.id)
+        self.assertNotIn('match_terms', second.result)
+
+
+class ATSAdminScaleTest(TestCase):
+    """Admin changelist behaviour on small and large tables"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        users = [User.objects.create_user(f'user{i}', password='x') for i in range(4)]
+        for i, user in enumerate(users):
+            ATSAnalysis.objects.create(user=user, score=40 + i * 15)
+        self.client.force_login(self.admin)
+
+    def test_score_bands_and_select_related(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/admin/ats/atsanalysis/', {'score_band': 'good'})
+        # Only the signed-in user is loaded on its own; analysis users are joined
+        user_queries = [q for q in captured.captured_queries if 'FROM "auth_user"' in q['sql']]
+        self.assertEqual(len(user_queries), 1)
+        self.assertEqual([a.score for a in response.context['cl'].result_list], [70])
+        self.assertContains(response, 'Below 50')
+
+    def test_small_table_keeps_exact_counts(self):
+        response = self.client.get('/admin/ats/atsanalysis/', {'score_band': 'low'})
+        cl = response.context['cl']
+        self.assertEqual(cl.full_result_count, 4)
+        self.assertEqual(cl.date_hierarchy, 'created_at')
+
+    @override_settings(ADMIN_COUNT_EXACT_LIMIT=2)
+    def test_large_table_skips_full_counts(self):
+        response = self.client.get('/admin/ats/atsanalysis/')
+        cl = response.context['cl']
+        self.assertIsNone(cl.full_result_count)
+        self.assertIsNone(cl.date_hierarchy)
+        self.assertEqual(cl.result_count, 4)  # no estimator on SQLite, so counted exactly
+
+
+class ATSRetentionTest(TestCase):
+    """Rolling up and deleting old detailed analyses"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('busy', password='x')
+        self.other = User.objects.create_user('quiet', password='x')
+        base = timezone.now() - timedelta(days=10)
+        for i, score in enumerate([35, 72, 78, 100, None, 64, 90, 55]):
+            analysis = ATSAnalysis.objects.create(
+                user=self.user, score=score,
+                status=ATSAnalysis.STATUS_FAILED if score is None else ATSAnalysis.STATUS_DONE)
+            ATSAnalysis.objects.filter(pk=analysis.pk).update(created_at=base + timedelta(days=i // 3))
+        ATSAnalysis.objects.create(user=self.user, status=ATSAnalysis.STATUS_PENDING)
+        ATSAnalysis.objects.create(user=self.other, score=80)
+        # As if stored before the rollups existed
+        ATSAnalysis.objects.update(rolled_up=False)
+        ATSDailyRollup.objects.all().delete()
+
+    def test_keeps_recent_and_rolls_up_the_rest(self):
+        out = io.StringIO()
+        call_command('ats_retention', keep=3, batch_size=2, stdout=out)
+        self.assertIn('deleted 5 analyses from 1 users', out.getvalue())
+        remaining = ATSAnalysis.objects.filter(user=self.user)
+        self.assertEqual(remaining.count(), 4)  # three most recent finished + the pending one
+        self.assertEqual(sorted(a.score for a in remaining if a.score is not None), [55, 64, 90])
+        self.assertEqual(ATSAnalysis.objects.filter(user=self.other).count(), 1)
+
+        rollups = {(r.bucket, r.analyses, r.score_total) for r in ATSDailyRollup.objects.all()}
+        self.assertEqual(rollups, {(3, 1, 35), (7, 2, 150), (9, 1, 100), (ATSDailyRollup.NO_SCORE, 1, 0)})
+        self.assertEqual(ATSDailyRollup.objects.values('day').distinct().count(), 2)
+
+    def test_dry_run(self):
+        out = io.StringIO()
+        call_command('ats_retention', keep=3, dry_run=True, stdout=out)
+        self.assertIn('5 analyses from 1 users', out.getvalue())
+        self.assertEqual(ATSAnalysis.objects.count(), 10)
+        self.assertFalse(ATSDailyRollup.objects.exists())
+
+    def test_rollup_counters_accumulate(self):
+        day = timezone.localdate()
+        add_to_rollup(day, 7, 1, 75)
+        add_to_rollup(day, 7, 2, 150)
+        rollup = ATSDailyRollup.objects.get(day=day, bucket=7)
+        self.assertEqual((rollup.analyses, rollup.score_total), (3, 225))
+        self.assertEqual([score_bucket(s) for s in (0, 9, 10, 99, 100, None)], [0, 0, 1, 9, 9, -1])
+
+
+
+class ATSRollupTest(TestCase):
+    """Counters maintained as analyses finish, and the staff dashboard built on them"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('testuser', password='x')
+
+    def test_counted_once_when_finished(self):
+        analysis = ATSAnalysis.objects.create(user=self.user, status=ATSAnalysis.STATUS_PENDING)
+        self.assertFalse(ATSDailyRollup.objects.exists())
+        analysis.status, analysis.score = ATSAnalysis.STATUS_DONE, 82
+        analysis.save()
+        analysis.save()
+        ATSAnalysis.objects.create(user=self.user, score=88)
+        rollup = ATSDailyRollup.objects.get(bucket=8)
+        self.assertEqual((rollup.day, rollup.analyses, rollup.score_total), (timezone.localdate(), 2, 170))
+
+        # Retention deletes counted rows without counting them again
+        call_command('ats_retention', keep=0, stdout=io.StringIO())
+        self.assertFalse(ATSAnalysis.objects.exists())
+        self.assertEqual(ATSDailyRollup.objects.get(bucket=8).analyses, 2)
+
+    def test_backfill_counts_uncounted_rows(self):
+        for score in (45, 47, None):
+            ATSAnalysis.objects.create(user=self.user, score=score, status=ATSAnalysis.STATUS_FAILED
+                                       if score is None else ATSAnalysis.STATUS_DONE)
+        ATSAnalysis.objects.create(user=self.user, status=ATSAnalysis.STATUS_PENDING)
+        ATSAnalysis.objects.update(rolled_up=False)
+        ATSDailyRollup.objects.all().delete()
+
+        out = io.StringIO()
+        call_command('ats_rollup_backfill', batch_size=2, stdout=out)
+        self.assertIn('Added 3 analyses', out.getvalue())
+        call_command('ats_rollup_backfill', stdout=io.StringIO())
+        counts = dict(ATSDailyRollup.objects.values_list('bucket', 'analyses'))
+        self.assertEqual(counts, {4: 2, ATSDailyRollup.NO_SCORE: 1})
+
+    def test_dashboard_reads_rollups_only(self):
+        today = timezone.localdate()
+        add_to_rollup(today, 7, 3, 225)
+        add_to_rollup(today, ATSDailyRollup.NO_SCORE, 1, 0)
+        add_to_rollup(today - timedelta(days=1), 5, 1, 55)
+        add_to_rollup(today - timedelta(days=400), 9, 5, 470)
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        with self.assertNumQueries(3):  # session, user, rollups
+            response = self.client.get(reverse('ats:dashboard'), {'days': 30})
+        summary = response.context['summary']
+        self.assertEqual((summary['total'], summary['failed'], summary['average']), (5, 1, 70.0))
+        self.assertEqual([entry['analyses'] for entry in summary['days']], [1, 4])
+        self.assertEqual(summary['buckets'][7]['analyses'], 3)
+        self.assertContains(response, 'Score distribution')
+
+    def test_dashboard_is_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('ats:dashboard'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ATSPayloadTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='payloads', password='TestPass123!')
+        self.sections = [{'title': 'Skills', 'items': ['Add a skills section']}]
+
+    def test_identical_sections_share_one_payload(self):
+        first, created = intern_sections(self.sections)
+        self.assertTrue(created)
+        # Key order does not change the digest
+        second, created = intern_sections([{'items': ['Add a skills section'], 'title': 'Skills'}])
+        self.assertFalse(created)
+        self.assertEqual(first.pk, second.pk)
+
+    def test_result_is_reassembled(self):
+        result = {'score': 72, 'sections': self.sections, 'meta': {'words': 300}}
+        analysis = ATSAnalysis.objects.create(user=self.user, **result_fields(result))
+        self.assertEqual(analysis.suggestions_json, {'meta': {'words': 300}})
+        analysis = ATSAnalysis.objects.get(pk=analysis.pk)
+        self.assertEqual(analysis.result, result)
+
+    def test_backfill_moves_legacy_rows(self):
+        for score in (60, 70, 80):
+            ATSAnalysis.objects.create(user=self.user, score=score, suggestions_json={
+                'score': score, 'sections': self.sections, 'meta': {'score': score}})
+        untouched = ATSAnalysis.objects.create(user=self.user, score=50)
+        out = io.StringIO()
+        call_command('ats_payload_backfill', batch_size=2, stdout=out)
+        self.assertIn('Moved 3 analyses onto 1 new payloads', out.getvalue())
+        self.assertEqual(ATSSuggestionPayload.objects.count(), 1)
+        for analysis in ATSAnalysis.objects.exclude(pk=untouched.pk):
+            self.assertEqual(analysis.suggestions_json, {'meta': {'score': analysis.score}})
+            self.assertEqual(analysis.result['sections'], self.sections)
+        self.assertIsNone(ATSAnalysis.objects.get(pk=untouched.pk).payload_id)
+
+        orphan = ATSSuggestionPayload.objects.create(digest='0' * 64, sections=[])
+        ATSSuggestionPayload.objects.filter(pk=orphan.pk).update(created_at=timezone.now() - timedelta(days=1))
+        fresh = ATSSuggestionPayload.objects.create(digest='1' * 64, sections=[])
+        out = io.StringIO()
+        call_command('ats_payload_backfill', '--no-prune', stdout=out)
+        self.assertNotIn('unreferenced', out.getvalue())
+        out = io.StringIO()
+        call_command('ats_payload_backfill', stdout=out)
+        self.assertIn('Moved 0 analyses', out.getvalue())
+        self.assertIn('Deleted 1 unreferenced payloads', out.getvalue())
+        self.assertTrue(ATSSuggestionPayload.objects.filter(pk=fresh.pk).exists())
+
+
+@override_settings(ATS_HISTORY_PAGE_SIZE=2)
+class ATSHistoryTest(TestCase):
+    """Per-user history pages: cursor paging, no JSON columns in listings, detail on demand"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='history', password='TestPass123!')
+        other = User.objects.create_user(username='other', password='TestPass123!')
+        ATSAnalysis.objects.create(user=other, score=10)
+        now = timezone.now()
+        self.analyses = []
+        for score in (55, 65, 75, 85, 95):
+            result = {'score': score, 'sections': [{'title': 'Tips', 'items': [str(score)]}], 'meta': {}}
+            analysis = ATSAnalysis.objects.create(user=self.user, **result_fields(result))
+            self.analyses.append(analysis)
+        # The first two share a timestamp, so paging must break ties on id
+        ATSAnalysis.objects.filter(pk__in=[a.pk for a in self.analyses[:2]]).update(created_at=now)
+        for i, analysis in enumerate(self.analyses[2:], start=1):
+            ATSAnalysis.objects.filter(pk=analysis.pk).update(created_at=now + timedelta(minutes=i))
+        self.client.login(username='history', password='TestPass123!')
+
+    def test_api_pages_through_history_by_cursor(self):
+        url = reverse('ats:api_history')
+        seen, cursor = [], None
+        with CaptureQueriesContext(connection) as queries:
+            while True:
+                data = self.client.get(url, {'cursor': cursor} if cursor else {}).json()
+                seen += [row['score'] for row in data['results']]
+                cursor = data['next_cursor']
+                if not cursor:
+                    break
+        self.assertEqual(seen, [95, 85, 75, 65, 55])
+        listing = [q['sql'] for q in queries.captured_queries if 'ats_atsanalysis' in q['sql']]
+        self.assertTrue(listing)
+        self.assertFalse(any('suggestions_json' in sql for sql in listing))
+
+    def test_detail_api_returns_full_result_for_owner_only(self):
+        analysis = self.analyses[0]
+        data = self.client.get(reverse('ats:api_history_detail', args=[analysis.pk])).json()
+        self.assertEqual(data['result']['sections'][0]['items'], ['55'])
+        self.client.login(username='other', password='TestPass123!')
+        response = self.client.get(reverse('ats:api_history_detail', args=[analysis.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_history_page_links_to_results(self):
+        response = self.client.get(reverse('ats:history'))
+        self.assertEqual([a.score for a in response.context['page_obj']], [95, 85])
+        self.assertContains(response, f"?analysis={self.analyses[-1].pk}")
+        self.assertContains(response, 'rel="next"')
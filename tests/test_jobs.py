@@ -0,0 +1,800 @@
+"""
+Tests for job listings
+Run with: python manage.py test tests.test_jobs
+"""
+import csv
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from common import counting
+from common.checks import check_shared_default_cache
+from common.generations import bump_generation, get_generation
+from common.pagination import KeysetPaginator
+from jobs.admin import LocationFilter
+from jobs.matching import JobMatchIndex, match_jobs
+from jobs.models import GovernmentJob, GovernmentJobArchive, PrivateJob
+from jobs.query_plans import explain, plan_problems
+from jobs.normalization import normalize_location, normalize_qualification
+from jobs.search import search_backend, search_jobs
+from tests import listing_plans
+
+
+# Apply links are unique once normalized, so each helper posting gets its own
+LINK_IDS = itertools.count()
+
+
+def make_government_job(**kwargs):
+    fields = {
+        'company': 'Test Dept',
+        'post_name': 'Clerk',
+        'education': 'Graduate',
+        'total_posts': 10,
+        'location': 'Delhi',
+        'last_date': date.today() + timedelta(days=30),
+        'apply_link': f'http://example.com/apply/{next(LINK_IDS)}',
+    }
+    fields.update(kwargs)
+    return GovernmentJob.objects.create(**fields)
+
+
+def make_private_job(**kwargs):
+    fields = {
+        'company_name': 'Test Corp',
+        'role': 'Developer',
+        'salary': '5-8 LPA',
+        'location': 'Bangalore',
+        'qualification': 'B.Tech',
+        'experience': '2-4 years',
+        'apply_link': f'http://example.com/apply/{next(LINK_IDS)}',
+    }
+    fields.update(kwargs)
+    return PrivateJob.objects.create(**fields)
+
+
+class JobMatchIndexTest(TestCase):
+    """Test TF-IDF resume-to-job matching"""
+
+    def setUp(self):
+        self.engineer = make_government_job(post_name='Civil Engineer', education='B.Tech Civil Engineering',
+                                            company='Public Works Department')
+        self.teacher = make_government_job(post_name='Primary Teacher', education='B.Ed',
+                                           company='Education Board')
+        self.developer = make_private_job(role='Python Developer', qualification='B.Tech Computer Science',
+                                          company_name='Infosys')
+        self.index = JobMatchIndex()
+        self.index.refresh()
+
+    def test_ranks_best_match_first(self):
+        results = self.index.query('Experienced python developer, computer science graduate', k=3)
+        self.assertEqual(results[0][:2], ('private', self.developer.id))
+        results = self.index.query('B.Ed teacher with primary school experience', k=1)
+        self.assertEqual(results[0][:2], ('government', self.teacher.id))
+
+    def test_unrelated_text_has_no_matches(self):
+        self.assertEqual(self.index.query('zzz qqq'), [])
+
+    def test_refresh_is_incremental(self):
+        self.assertEqual(self.index.refresh(), 0)
+        self.teacher.post_name = 'Python Teacher'
+        self.teacher.save()
+        self.assertEqual(self.index.refresh(), 1)
+
+    def test_inactive_jobs_dropped(self):
+        GovernmentJob.objects.filter(pk=self.engineer.pk).update(is_active=False)
+        self.index.refresh()
+        keys = [result[:2] for result in self.index.query('civil engineer', k=3)]
+        self.assertNotIn(('government', self.engineer.id), keys)
+
+    @override_settings(JOB_MATCH_REFRESH_INTERVAL=0)
+    def test_match_jobs_returns_serializable_matches(self):
+        matches = match_jobs('civil engineering', k=2)
+        self.assertEqual(matches[0]['kind'], 'government')
+        self.assertEqual(matches[0]['id'], self.engineer.id)
+        self.assertGreater(matches[0]['score'], 0)
+
+
+class JobSearchTest(TestCase):
+    """Test full-text job search"""
+
+    def setUp(self):
+        self.engineer = make_government_job(post_name='Assistant Engineer', education='B.Tech Civil Engineering',
+                                            company='Public Works Department')
+        self.engineers = make_government_job(post_name='Junior Engineers', education='Diploma in Engineering',
+                                             company='Railway Board')
+        self.clerk = make_government_job(post_name='Clerk', education='Graduate', company='Civil Court')
+        self.developer = make_private_job(role='Backend Developer', qualification='B.Tech',
+                                          company_name='Python Labs')
+
+    def search(self, query, model=GovernmentJob):
+        return list(search_jobs(model.objects.filter(is_active=True), query))
+
+    def test_uses_fts5_on_sqlite(self):
+        if connection.vendor == 'sqlite':
+            self.assertEqual(search_backend(GovernmentJob), 'sqlite')
+
+    def test_multi_term_query_requires_every_term(self):
+        self.assertEqual(self.search('civil engineer'), [self.engineer])
+        self.assertCountEqual(self.search('civil'), [self.engineer, self.clerk])
+
+    def test_stemming_matches_inflections(self):
+        self.assertCountEqual(self.search('engineering'), [self.engineer, self.engineers])
+        self.assertCountEqual(self.search('engineers'), [self.engineer, self.engineers])
+
+    def test_ranked_by_relevance(self):
+        # "engineer" appears in both the title and education of the second posting
+        results = self.search('engineer diploma')
+        self.assertEqual(results, [self.engineers])
+        results = self.search('engineer')
+        self.assertEqual(set(results), {self.engineer, self.engineers})
+        self.assertTrue(all(hasattr(job, 'relevance') for job in results))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.clerk.post_name = 'Stenographer'
+        self.clerk.save()
+        self.assertEqual(self.search('stenographer'), [self.clerk])
+        self.assertEqual(self.search('clerk'), [])
+        self.clerk.delete()
+        self.assertEqual(self.search('stenographer'), [])
+
+    def test_private_jobs(self):
+        self.assertEqual(self.search('python developer', PrivateJob), [self.developer])
+
+    def test_punctuation_is_not_query_syntax(self):
+        self.assertEqual(self.search('"engineer* (-'), self.search('engineer'))
+        self.assertEqual(self.search('!!!'), self.search(''))
+
+    def test_like_fallback(self):
+        connection.__dict__['_job_search_backends'] = {GovernmentJob: None}
+        try:
+            self.assertEqual(self.search('civil engineer'), [self.engineer])
+        finally:
+            connection.__dict__.pop('_job_search_backends')
+
+    def test_short_terms_still_filter_on_mysql(self):
+        # Terms below InnoDB's minimum token size are matched with LIKE, not dropped
+        make_private_job(role='IT Support', qualification='Diploma', company_name='Helpdesk Co')
+        connection.__dict__['_job_search_backends'] = {PrivateJob: 'mysql'}
+        try:
+            results = self.search('IT', PrivateJob)
+        finally:
+            connection.__dict__.pop('_job_search_backends')
+        self.assertEqual([job.role for job in results], ['IT Support'])
+
+    def test_listing_view_searches(self):
+        response = self.client.get(reverse('jobs:government'), {'q': 'railway'})
+        self.assertEqual(list(response.context['page_obj']), [self.engineers])
+        self.assertEqual(response.context['total_jobs'], 1)
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor pagination of job listings"""
+
+    def setUp(self):
+        # Shared deadlines force the created_at/id tiebreakers to matter
+        for i in range(23):
+            make_government_job(post_name=f'Post {i}', last_date=date.today() + timedelta(days=i % 4))
+        self.jobs = GovernmentJob.objects.filter(is_active=True)
+        self.ordering = ['-last_date', '-created_at', '-id']
+        self.expected = list(self.jobs.order_by(*self.ordering))
+
+    def paginator(self, **kwargs):
+        return KeysetPaginator(self.jobs, 5, self.ordering, numbered_pages=2, **kwargs)
+
+    def test_walks_forward_and_back_without_gaps(self):
+        paginator = self.paginator()
+        page = paginator.page(1)
+        seen = list(page)
+        while page.has_next():
+            page = paginator.page(cursor=page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(page.number, 5)
+
+        back = []
+        while page.has_previous():
+            page = paginator.page(cursor=page.previous_cursor)
+            back = list(page) + back
+        self.assertEqual(page.number, 1)
+        self.assertEqual(back, self.expected[:20])
+
+    def test_numbered_pages_limited(self):
+        paginator = self.paginator(count=23)
+        self.assertEqual(list(paginator.page(2)), self.expected[5:10])
+        self.assertEqual(list(paginator.page(4)), self.expected[5:10])
+        self.assertEqual(list(paginator.page('x')), self.expected[:5])
+        self.assertEqual(list(paginator.page_range), [1, 2])
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        paginator = self.paginator()
+        cursor = paginator.page(1).next_cursor
+        self.assertEqual(list(paginator.page(cursor=cursor[:-2] + 'xx')), self.expected[:5])
+        other = KeysetPaginator(PrivateJob.objects.all(), 5, ['-created_at', '-id'])
+        self.assertIsNone(other.decode_cursor(cursor))
+
+    def test_cursor_tokens_are_stable(self):
+        paginator = self.paginator()
+        row = self.expected[4]
+        with mock.patch('time.time', return_value=time.time() + 3600):
+            later = paginator.encode_cursor(row, 2)
+        self.assertEqual(paginator.encode_cursor(row, 2), later)
+
+    def test_cursor_pages_do_not_use_offset(self):
+        paginator = self.paginator()
+        cursor = paginator.page(2).next_cursor
+        with self.assertNumQueries(1) as queries:
+            list(paginator.page(cursor=cursor))
+        self.assertNotIn('OFFSET', queries.captured_queries[0]['sql'])
+
+    def test_listing_links_use_cursors(self):
+        response = self.client.get(reverse('jobs:government'))
+        page = response.context['page_obj']
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+        response = self.client.get(reverse('jobs:government'), {'cursor': page.next_cursor})
+        self.assertEqual(list(response.context['page_obj']), self.expected[15:])
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class ListingCountTest(TestCase):
+    """Test cached and estimated listing counts"""
+
+    def setUp(self):
+        cache.clear()
+        for i in range(4):
+            make_government_job(post_name=f'Clerk {i}', location='New Delhi')
+
+    def test_one_count_query_per_listing_request(self):
+        with self.assertNumQueries(3):  # count + first page + facets
+            response = self.client.get(reverse('jobs:government'))
+        self.assertEqual(response.context['total_jobs'], 4)
+        with self.assertNumQueries(1):  # count and facets served from cache
+            self.client.get(reverse('jobs:government'))
+
+    def test_equivalent_filters_share_a_count(self):
+        self.client.get(reverse('jobs:government'), {'q': 'Clerk', 'location': 'new  delhi'})
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('jobs:government'), {'q': ' clerk ', 'location': 'New Delhi'})
+        self.assertEqual(response.context['total_jobs'], 4)
+
+    def test_saving_a_job_invalidates_counts(self):
+        self.client.get(reverse('jobs:government'))
+        generation = get_generation(GovernmentJob)
+        make_government_job()
+        self.assertNotEqual(get_generation(GovernmentJob), generation)
+        self.assertEqual(self.client.get(reverse('jobs:government')).context['total_jobs'], 5)
+
+    def test_estimate_above_exact_limit(self):
+        jobs = GovernmentJob.objects.all()
+        self.assertEqual(counting.count_rows(jobs, exact_limit=10), (4, False))
+        with mock.patch.dict(counting.ESTIMATORS, {connection.vendor: lambda queryset: 1000}):
+            self.assertEqual(counting.count_rows(jobs, exact_limit=3), (1000, True))
+            with override_settings(JOB_COUNT_EXACT_LIMIT=2):
+                response = self.client.get(reverse('jobs:government'))
+        self.assertContains(response, 'Found about 1000 jobs')
+
+    def test_estimate_does_not_extend_search_pages(self):
+        with mock.patch.dict(counting.ESTIMATORS, {connection.vendor: lambda queryset: 1000}):
+            with override_settings(JOB_COUNT_EXACT_LIMIT=2):
+                response = self.client.get(reverse('jobs:government'), {'q': 'clerk'})
+        self.assertContains(response, 'Found about 1000 jobs')
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.num_pages, 1)
+        self.assertFalse(page.has_next())
+
+
+class ListingCacheTest(TestCase):
+    """Test generation-keyed listing page caching"""
+
+    def setUp(self):
+        cache.clear()
+        self.job = make_government_job(post_name='Forest Guard')
+
+    def test_anonymous_pages_served_from_cache(self):
+        self.client.get(reverse('jobs:government'), {'q': 'forest'})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('jobs:government'), {'q': 'Forest '})
+        self.assertContains(response, 'Forest Guard')
+
+    def test_equivalent_requests_render_the_normalized_filters(self):
+        self.client.get(reverse('jobs:government'), {'location': 'Bangalore', 'q': 'Forest'})
+        response = self.client.get(reverse('jobs:government'), {'location': 'bengaluru', 'q': 'forest '})
+        self.assertContains(response, 'name="location" class="form-control" placeholder="Location" value="bengaluru"')
+        self.assertContains(response, 'value="forest"')
+        self.assertNotContains(response, 'Bangalore')
+
+    def test_cached_facet_links_carry_only_normalized_filters(self):
+        make_government_job(post_name='Scientist', location='Bangalore')
+        self.client.get(reverse('jobs:government'), {'location': 'Bangalore', 'utm_source': 'spam'})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('jobs:government'), {'location': 'bengaluru'})
+        self.assertContains(response, 'href="?status=all&amp;location=bengaluru"')
+        self.assertNotContains(response, 'utm_source')
+
+    def test_save_and_delete_invalidate(self):
+        self.client.get(reverse('jobs:government'))
+        self.job.post_name = 'Range Officer'
+        self.job.save()
+        self.assertContains(self.client.get(reverse('jobs:government')), 'Range Officer')
+        self.job.delete()
+        self.assertNotContains(self.client.get(reverse('jobs:government')), 'Range Officer')
+
+    def test_mark_inactive_action_invalidates(self):
+        self.assertContains(self.client.get(reverse('jobs:government')), 'Forest Guard')
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        request = RequestFactory().post('/admin/jobs/governmentjob/')
+        request.user = admin
+        model_admin = site._registry[GovernmentJob]
+        with mock.patch.object(model_admin, 'message_user'):
+            model_admin.mark_inactive(request, GovernmentJob.objects.all())
+        self.assertNotContains(self.client.get(reverse('jobs:government')), 'Forest Guard')
+
+    def test_signed_in_users_get_fresh_pages_with_cached_cards(self):
+        User.objects.create_user('reader', password='pass')
+        self.client.login(username='reader', password='pass')
+        self.client.get(reverse('jobs:government'))
+        GovernmentJob.objects.filter(pk=self.job.pk).update(post_name='Forest Ranger')
+        self.assertContains(self.client.get(reverse('jobs:government')), 'Forest Ranger')
+
+    def test_bulk_create_bumps_generation(self):
+        generation = get_generation(PrivateJob)
+        PrivateJob.objects.bulk_create([PrivateJob(company_name='A', role='B', salary='1', location='C',
+                                                   qualification='D', experience='E',
+                                                   apply_link='http://example.com')])
+        self.assertGreater(get_generation(PrivateJob), generation)
+        cache.delete(f'generation:{PrivateJob._meta.label_lower}')
+        self.assertGreater(bump_generation(PrivateJob), generation)
+
+    def test_check_requires_shared_default_cache(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                              'LOCATION': '127.0.0.1:11211'}}
+        with override_settings(CACHES=local):
+            self.assertEqual([e.id for e in check_shared_default_cache(None)], ['common.E001'])
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_default_cache(None), [])
+
+
+class FacetTest(TestCase):
+    """Test normalized keys and facet counts"""
+
+    def setUp(self):
+        cache.clear()
+        make_government_job(location='Bangalore', education='B.Tech')
+        make_government_job(location='Bengaluru ', education='B. Tech')
+        make_government_job(location='New Delhi', education='Graduate')
+        make_private_job(location='Mumbai', qualification='M.B.A')
+
+    def test_normalization(self):
+        self.assertEqual(normalize_location('  Bangalore'), 'bengaluru')
+        self.assertEqual(normalize_location('Tamil Nadu'), 'tamil-nadu')
+        self.assertEqual(normalize_location('tamil-nadu'), 'tamil-nadu')
+        self.assertEqual(normalize_qualification('B. Tech'), 'btech')
+        self.assertEqual(normalize_qualification('M.B.A'), 'mba')
+        self.assertEqual(normalize_qualification('B.E. Mech'), 'be-mech')
+
+    def test_keys_set_on_save_and_bulk_create(self):
+        job = GovernmentJob.objects.get(location='New Delhi')
+        self.assertEqual((job.location_key, job.education_key), ('delhi', 'graduate'))
+        job.location = 'Bombay'
+        job.save(update_fields=['location'])
+        job.refresh_from_db()
+        self.assertEqual(job.location_key, 'mumbai')
+        GovernmentJob.objects.bulk_create([GovernmentJob(company='X', post_name='Y', education='B.Sc',
+                                                         total_posts=1, location='Madras',
+                                                         last_date=date.today(), apply_link='http://x.com')])
+        self.assertTrue(GovernmentJob.objects.filter(location_key='chennai', education_key='bsc').exists())
+
+    def test_location_filter_is_key_equality(self):
+        response = self.client.get(reverse('jobs:government'), {'location': 'bangalore'})
+        self.assertEqual(response.context['total_jobs'], 2)
+        self.assertEqual(self.client.get(reverse('jobs:private'), {'location': 'bombay'}).context['total_jobs'], 1)
+
+    def test_facets_from_one_cached_query(self):
+        jobs = GovernmentJob.objects.filter(is_active=True)
+        facets = {'location_key': 'location', 'education_key': 'education'}
+        with self.assertNumQueries(1):
+            counts = counting.cached_facets(jobs, facets, {'q': ''}, timeout=60)
+        self.assertEqual([(key, count) for key, _, count in counts['location_key']],
+                         [('bengaluru', 2), ('delhi', 1)])
+        self.assertEqual(counts['education_key'][0][::2], ('btech', 2))
+        with self.assertNumQueries(0):
+            counting.cached_facets(jobs, facets, {'q': ''}, timeout=60)
+
+    def test_sidebar_links_narrow_results(self):
+        response = self.client.get(reverse('jobs:government'), {'status': 'active'})
+        locations = dict(response.context['facets'])['Location']['entries']
+        self.assertEqual(locations[0]['count'], 2)
+        self.assertIn('location=bengaluru', locations[0]['url'])
+        self.assertIn('status=active', locations[0]['url'])
+        response = self.client.get(reverse('jobs:government') + locations[0]['url'])
+        self.assertEqual(response.context['total_jobs'], 2)
+        education = dict(response.context['facets'])['Qualification']['entries']
+        self.assertEqual([(entry['count'], entry['selected']) for entry in education], [(2, False)])
+
+    def test_search_results_facets(self):
+        make_government_job(post_name='Forest Guard', location='Bhopal', education='10th')
+        response = self.client.get(reverse('jobs:government'), {'q': 'forest'})
+        locations = dict(response.context['facets'])['Location']['entries']
+        self.assertEqual([(entry['label'], entry['count']) for entry in locations], [('Bhopal', 1)])
+
+    def test_backfill_command(self):
+        GovernmentJob.objects.update(location_key='', education_key='', apply_link_hash=None)
+        call_command('normalize_job_keys', batch_size=2, stdout=mock.MagicMock())
+        self.assertEqual(GovernmentJob.objects.filter(location_key='bengaluru').count(), 2)
+        self.assertFalse(GovernmentJob.objects.filter(apply_link_hash__isnull=True).exists())
+
+    def test_backfill_leaves_duplicate_links_unhashed(self):
+        first, second = GovernmentJob.objects.order_by('id')[:2]
+        GovernmentJob.objects.filter(id=second.id).update(apply_link=first.apply_link + '?utm_source=x',
+                                                          apply_link_hash=None)
+        err = StringIO()
+        call_command('normalize_job_keys', stdout=mock.MagicMock(), stderr=err)
+        second.refresh_from_db()
+        self.assertIsNone(second.apply_link_hash)
+        self.assertIn(str(second.id), err.getvalue())
+
+    def test_admin_location_filter(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get('/admin/jobs/governmentjob/', {'location_key': 'bengaluru'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, 'Bengaluru')
+
+    def test_admin_filter_choices_survive_writes(self):
+        model_admin = site._registry[GovernmentJob]
+        request = RequestFactory().get('/admin/jobs/governmentjob/')
+        choices = LocationFilter(request, {}, GovernmentJob, model_admin).lookup_choices
+        self.assertEqual(choices[0][0], 'bengaluru')
+        make_government_job(location='Chennai')
+        # No GROUP BY per save; the choices expire after ADMIN_COUNT_CACHE_TIMEOUT instead
+        with self.assertNumQueries(0):
+            self.assertEqual(LocationFilter(request, {}, GovernmentJob, model_admin).lookup_choices, choices)
+
+
+class JobListAPITest(TestCase):
+    """Test the JSON listing API"""
+
+    def setUp(self):
+        for i in range(3):
+            make_government_job(post_name=f'Clerk {i}', location='Delhi', last_date=date.today() + timedelta(days=i))
+        make_government_job(post_name='Forest Guard', location='Bhopal')
+        self.url = reverse('jobs:api_government')
+
+    def test_projection_and_filters(self):
+        response = self.client.get(self.url, {'fields': 'id,post_name', 'location': 'new delhi'})
+        data = response.json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(set(data['results'][0]), {'id', 'post_name'})
+        self.assertEqual(data['results'][0]['post_name'], 'Clerk 2')
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get(self.url, {'fields': 'post_name,location_key'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_uses_listing_semantics(self):
+        data = self.client.get(self.url, {'q': 'forest guards'}).json()
+        self.assertEqual([row['post_name'] for row in data['results']], ['Forest Guard'])
+        data = self.client.get(reverse('jobs:api_private'), {'q': 'forest'}).json()
+        self.assertEqual(data['count'], 0)
+
+    def test_cursor_pages(self):
+        data = self.client.get(self.url, {'page_size': 3, 'fields': 'post_name'}).json()
+        self.assertEqual(len(data['results']), 3)
+        data = self.client.get(self.url, {'page_size': 3, 'fields': 'post_name',
+                                          'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(2):  # the validator aggregates only
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # A different projection is a different representation
+        self.assertEqual(self.client.get(self.url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        GovernmentJob.objects.filter(post_name='Forest Guard').update(is_active=False)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since_only(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # Deactivating the most recently changed posting must not look unmodified
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        request = RequestFactory().post('/admin/jobs/governmentjob/')
+        request.user = admin
+        model_admin = site._registry[GovernmentJob]
+        later = timezone.now() + timedelta(minutes=5)
+        with mock.patch.object(model_admin, 'message_user'), mock.patch('django.utils.timezone.now', return_value=later):
+            model_admin.mark_inactive(request, GovernmentJob.objects.filter(post_name='Forest Guard'))
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(last_modified))
+
+
+class DeadlineTest(TestCase):
+    """Test database-computed deadline state and the expiry sweeper"""
+
+    def setUp(self):
+        cache.clear()
+        today = date.today()
+        self.open = make_government_job(post_name='Open', last_date=today + timedelta(days=9))
+        self.closing = make_government_job(post_name='Closing', last_date=today)
+        self.closed = make_government_job(post_name='Closed', last_date=today - timedelta(days=3))
+        self.ancient = make_government_job(post_name='Ancient', last_date=today - timedelta(days=90))
+
+    def test_annotation_matches_properties(self):
+        for job in GovernmentJob.objects.with_deadlines():
+            plain = GovernmentJob.objects.get(pk=job.pk)
+            self.assertIn('deadline_passed', job.__dict__)
+            self.assertEqual((job.is_expired, job.days_remaining), (plain.is_expired, plain.days_remaining))
+        job = GovernmentJob.objects.with_deadlines().get(pk=self.open.pk)
+        self.assertEqual((job.is_expired, job.days_remaining), (False, 9))
+
+    def now_calls(self):
+        with mock.patch('django.utils.timezone.now', wraps=timezone.now) as now:
+            response = self.client.get(reverse('jobs:government'))
+        self.assertContains(response, '9 days left')
+        return now.call_count
+
+    def test_listing_does_not_recompute_per_row(self):
+        calls = self.now_calls()
+        for i in range(5):
+            make_government_job(post_name=f'More {i}')
+        self.assertEqual(self.now_calls(), calls)
+
+    def test_api_deadline_fields(self):
+        data = self.client.get(reverse('jobs:api_government'), {'fields': 'post_name,days_remaining,is_expired'}).json()
+        rows = {row['post_name']: row for row in data['results']}
+        self.assertEqual(rows['Open'], {'post_name': 'Open', 'days_remaining': 9, 'is_expired': False})
+        self.assertEqual(rows['Closed']['is_expired'], True)
+
+    def test_expire_jobs_in_batches(self):
+        make_government_job(post_name='Older', last_date=date.today() - timedelta(days=60))
+        out = StringIO()
+        call_command('expire_jobs', after_days=30, dry_run=True, stdout=out)
+        self.assertIn('2 postings', out.getvalue())
+        self.assertEqual(GovernmentJob.objects.filter(is_active=False).count(), 0)
+        call_command('expire_jobs', after_days=30, batch_size=1, stdout=StringIO())
+        self.assertEqual(set(GovernmentJob.objects.filter(is_active=False).values_list('post_name', flat=True)),
+                         {'Ancient', 'Older'})
+
+
+class QueryPlanTest(TestCase):
+    """Every listing shape must filter and order through an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        listing_plans.seed_catalogue(government=3000, private=1500, batch_size=1000)
+
+    def test_listing_shapes_use_indexes(self):
+        failures = []
+        for name, url_name, params, deep, ranked in listing_plans.listing_shapes():
+            _, statements = listing_plans.run_shape(url_name, params, deep, ranked)
+            self.assertTrue(statements, name)
+            failures += [(name, sql, problems) for sql, plan, problems in statements if problems]
+        self.assertEqual(failures, [])
+
+    def test_unindexed_order_is_reported(self):
+        sql = str(GovernmentJob.objects.order_by('total_posts').query)
+        self.assertTrue(plan_problems(explain(sql)))
+
+    def test_full_index_scan_is_reported(self):
+        # Ordered by an index but filtered on nothing it leads with: every entry is read
+        sql = str(GovernmentJob.objects.filter(total_posts=7).order_by('updated_at').query)
+        self.assertTrue(plan_problems(explain(sql)))
+
+    def test_remove_seeded(self):
+        make_government_job()
+        self.assertEqual(listing_plans.remove_seeded(), 4500)
+        self.assertEqual(GovernmentJob.objects.count(), 1)
+
+
+class ImportJobsTest(TestCase):
+    """Streaming upsert of job feeds"""
+
+    def write_feed(self, name, content):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def import_feed(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_jobs', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_validates_and_upserts(self):
+        path = self.write_feed('gov.csv', (
+            'company,post_name,education,total_posts,location,last_date,apply_link\n'
+            'ISRO,Scientist,B.Tech,50,Bangalore,2030-12-31,https://isro.gov.in/apply?utm_source=x\n'
+            'SSC,Clerk,12th,abc,Delhi,2030-01-01,https://ssc.nic.in/clerk\n'
+            'SSC,Clerk,12th,100,Delhi,not-a-date,https://ssc.nic.in/steno\n'
+        ))
+        out, err = self.import_feed('government', path, '--batch-size', '2')
+        self.assertIn('Upserted 1 ', out)
+        self.assertIn('2 invalid', out)
+        self.assertIn('Line 3', err)
+        job = GovernmentJob.objects.get()
+        self.assertEqual(job.location_key, 'bengaluru')
+        self.assertEqual(job.last_date, date(2030, 12, 31))
+
+        # The same posting under a cosmetically different link is updated in place
+        path = self.write_feed('gov2.csv', (
+            'company,post_name,education,total_posts,location,last_date,apply_link\n'
+            'ISRO,Scientist,B.Tech,75,Bengaluru,2031-01-31,HTTPS://www.isro.gov.in/apply/\n'
+        ))
+        self.import_feed('government', path)
+        job = GovernmentJob.objects.get()
+        self.assertEqual(job.total_posts, 75)
+        self.assertEqual(job.last_date, date(2031, 1, 31))
+
+    def test_jsonl_import_dedupes_within_a_batch(self):
+        rows = [
+            {'company_name': 'Zoho', 'role': 'Developer', 'salary': '8 LPA', 'location': 'Chennai',
+             'qualification': 'B.E.', 'experience': '2 years', 'apply_link': 'https://zoho.com/jobs/1'},
+            {'company_name': 'Zoho', 'role': 'Senior Developer', 'salary': '12 LPA', 'location': 'Madras',
+             'qualification': 'B.E.', 'experience': '4 years', 'apply_link': 'https://zoho.com/jobs/1#apply'},
+            'not an object',
+        ]
+        path = self.write_feed('private.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n')
+        out, _ = self.import_feed('private', path)
+        self.assertIn('2 invalid, 1 repeated links', out)
+        job = PrivateJob.objects.get()
+        self.assertEqual(job.role, 'Senior Developer')
+        self.assertEqual(job.location_key, 'chennai')
+
+    def test_import_updates_posting_created_in_admin(self):
+        job = make_private_job(role='Analyst', apply_link='https://tcs.com/jobs/9')
+        self.assertIsNotNone(job.apply_link_hash)
+        path = self.write_feed('private.csv', (
+            'company_name,role,salary,location,qualification,experience,apply_link\n'
+            'TCS,Senior Analyst,7 LPA,Pune,Graduate,3 years,https://www.tcs.com/jobs/9/\n'
+        ))
+        self.import_feed('private', path)
+        job = PrivateJob.objects.get()
+        self.assertEqual(job.role, 'Senior Analyst')
+
+    def test_reimport_keeps_admin_deactivation(self):
+        content = ('company_name,role,salary,location,qualification,experience,apply_link\n'
+                   'TCS,Analyst,5 LPA,Pune,Graduate,1 year,https://tcs.com/jobs/9\n')
+        path = self.write_feed('private.csv', content)
+        self.import_feed('private', path)
+        PrivateJob.objects.update(is_active=False)
+        self.import_feed('private', path)
+        self.assertFalse(PrivateJob.objects.get().is_active)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write_feed('private.csv', (
+            'company_name,role,salary,location,qualification,experience,apply_link\n'
+            'TCS,Analyst,5 LPA,Pune,Graduate,1 year,https://tcs.com/jobs/9\n'
+        ))
+        out, _ = self.import_feed('private', path, '--dry-run')
+        self.assertIn('Validated 1 ', out)
+        self.assertFalse(PrivateJob.objects.exists())
+
+
+@override_settings(JOB_EXPORT_CHUNK_SIZE=2)
+class AdminExportTest(TestCase):
+    """Jobs admin changelists and their streaming CSV exports"""
+
+    def setUp(self):
+        for i in range(5):
+            make_government_job(post_name=f'Clerk {i}', location='Delhi' if i % 2 else 'Bangalore')
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.admin)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_export_selected(self):
+        ids = list(GovernmentJob.objects.filter(location='Delhi').values_list('id', flat=True))
+        response = self.client.post('/admin/jobs/governmentjob/', {
+            'action': 'export_as_csv', '_selected_action': ids,
+        })
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][:2], ['Company', 'Post Name'])
+        self.assertEqual(sorted(row[1] for row in rows[1:]), ['Clerk 1', 'Clerk 3'])
+
+    def test_export_all_matching_filters(self):
+        response = self.client.get('/admin/jobs/governmentjob/export/', {'location_key': 'bengaluru'})
+        rows = self.read_csv(response)
+        self.assertEqual([row[1] for row in rows[1:]], ['Clerk 0', 'Clerk 2', 'Clerk 4'])
+
+        response = self.client.get('/admin/jobs/governmentjob/')
+        self.assertContains(response, 'Export all matching as CSV')
+
+    def test_export_requires_admin(self):
+        self.client.logout()
+        response = self.client.get('/admin/jobs/governmentjob/export/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_bad_filter_redirects(self):
+        response = self.client.get('/admin/jobs/governmentjob/export/', {'no_such_field': 'x'})
+        self.assertRedirects(response, '/admin/jobs/governmentjob/?e=1')
+
+    @override_settings(ADMIN_COUNT_EXACT_LIMIT=3)
+    def test_large_job_table_hides_date_hierarchy(self):
+        cache.clear()
+        response = self.client.get('/admin/jobs/governmentjob/')
+        self.assertIsNone(response.context['cl'].date_hierarchy)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+
+@override_settings(JOB_ARCHIVE_AFTER_DAYS=365)
+class ArchiveJobsTest(TestCase):
+    """Moving dead postings into the archive tables"""
+
+    def setUp(self):
+        self.old = [make_government_job(post_name=f'Old {i}', last_date=date.today() - timedelta(days=400 + i))
+                    for i in range(3)]
+        self.recent = make_government_job(post_name='Recent', last_date=date.today() - timedelta(days=10))
+        self.stale_private = make_private_job(role='Gone', is_active=False)
+        self.live_private = make_private_job(role='Live')
+        PrivateJob.objects.filter(pk=self.stale_private.pk).update(
+            updated_at=timezone.now() - timedelta(days=400))
+
+    def test_archives_in_batches(self):
+        generation = get_generation(GovernmentJob)
+        out = StringIO()
+        call_command('archive_jobs', batch_size=2, stdout=out)
+        self.assertIn('Government Jobs: archived 3 postings', out.getvalue())
+        self.assertIn('Private Jobs: archived 1 postings', out.getvalue())
+        self.assertEqual(list(GovernmentJob.objects.values_list('post_name', flat=True)), ['Recent'])
+        self.assertEqual(list(PrivateJob.objects.values_list('role', flat=True)), ['Live'])
+        archived = GovernmentJobArchive.objects.get(original_id=self.old[0].pk)
+        self.assertEqual((archived.post_name, archived.last_date), ('Old 0', self.old[0].last_date))
+        self.assertEqual(archived.created_at, self.old[0].created_at)
+        self.assertNotEqual(get_generation(GovernmentJob), generation)
+
+        # Nothing left to move, so a second run is a no-op
+        call_command('archive_jobs', stdout=StringIO())
+        self.assertEqual(GovernmentJobArchive.objects.count(), 3)
+
+    def test_recently_deactivated_posting_is_kept(self):
+        PrivateJob.objects.filter(pk=self.live_private.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        request = RequestFactory().post('/admin/jobs/privatejob/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        model_admin = site._registry[PrivateJob]
+        with mock.patch.object(model_admin, 'message_user'):
+            model_admin.mark_inactive(request, PrivateJob.objects.filter(pk=self.live_private.pk))
+        call_command('archive_jobs', stdout=StringIO())
+        self.assertEqual(list(PrivateJob.objects.values_list('role', flat=True)), ['Live'])
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('archive_jobs', dry_run=True, stdout=out)
+        self.assertIn('3 postings would be archived', out.getvalue())
+        self.assertEqual(GovernmentJob.objects.count(), 4)
+
+    def test_archive_admin_search(self):
+        call_command('archive_jobs', stdout=StringIO())
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        response = self.client.get('/admin/jobs/governmentjobarchive/', {'q': 'Old 1'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(f'/admin/jobs/governmentjobarchive/{GovernmentJobArchive.objects.first().pk}/change/')
+        self.assertEqual(response.status_code, 200)